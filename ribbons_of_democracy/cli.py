@@ -0,0 +1,261 @@
+import argparse
+import os
+import signal
+import sys
+from functools import partial
+from .components.ribbon_model import BACKENDS, EXPORT_PRESETS, RIBBON_HEIGHT, RIBBON_WIDTH, resolve_size
+
+COMMANDS = ('render', 'rack', 'library', 'cache', 'watch', 'serve')
+
+
+def _parse_sizes(sizes):
+    # Reports the first size that is not a preset, scale or WIDTHxHEIGHT
+    for size in sizes:
+        try:
+            resolve_size(size)
+        except ValueError:
+            print(f"Invalid size {size!r}, use one of {', '.join(EXPORT_PRESETS)}, a scale such as 2x "
+                  "or a size such as 2048x564")
+            return False
+    return True
+
+
+def _check_backend(backend, sizes):
+    # sizes is None when any size can be asked for, as with serve
+    if backend != 'numpy':
+        return True
+    from .components.numpy_backend import available
+
+    if not available():
+        print("The numpy backend needs numpy, install it with 'pip install numpy' or the 'fast' extra")
+        return False
+    if sizes is None or any(resolve_size(size) != (RIBBON_WIDTH, RIBBON_HEIGHT) for size in sizes):
+        print(f"Warning: the numpy backend only draws at {RIBBON_WIDTH}x{RIBBON_HEIGHT}, "
+              "other sizes are drawn with QPainter")
+    return True
+
+
+def _apply_asset_path(args):
+    from .components.asset_catalog import ASSET_PATH_ENV, asset_catalog
+
+    for root in args.assets or ():
+        asset_catalog.add_root(root)
+    if args.assets:
+        # Worker processes build their own catalog from the environment
+        roots = [os.environ[ASSET_PATH_ENV]] if os.environ.get(ASSET_PATH_ENV) else []
+        os.environ[ASSET_PATH_ENV] = os.pathsep.join(roots + [os.path.abspath(root) for root in args.assets])
+
+
+def run_render(args):
+    from .components.batch_renderer import collect_decorations, render_batch
+
+    _apply_asset_path(args)
+    decorations = collect_decorations(args.inputs)
+    if not decorations:
+        print("No decoration files found.")
+        return 1
+    if not _parse_sizes(args.size or ()) or not _check_backend(args.backend, args.size or ['game']):
+        return 1
+    summary = render_batch(decorations, args.output, jobs=args.jobs, backend=args.backend, sizes=args.size,
+                           use_cache=not args.no_cache)
+    return 1 if summary['failed'] else 0
+
+
+def run_watch(args):
+    from .components.batch_renderer import init_worker
+    from .components.asset_catalog import asset_catalog
+    from .components.watcher import DecorationWatcher
+
+    if not os.path.isdir(args.folder):
+        print(f"{args.folder} is not a directory")
+        return 1
+    if not _parse_sizes(args.size or ()) or not _check_backend(args.backend, args.size or ['game']):
+        return 1
+    for root in args.assets or ():
+        asset_catalog.add_root(root)
+    init_worker()
+    # Flushed line by line so the log can be piped or tailed while it runs
+    out = partial(print, flush=True)
+    watcher = DecorationWatcher(args.folder, args.output, sizes=args.size, backend=args.backend,
+                                use_cache=not args.no_cache, out=out)
+    out(f"Watching {args.folder} and {len(watcher.watched_dirs()) - 1} asset folders, press Ctrl+C to stop")
+    watcher.run(interval=args.interval, debounce=args.debounce)
+    return 0
+
+
+def run_serve(args):
+    from .components.batch_renderer import init_worker
+    from .components.render_cache import parse_size
+    from .components.render_server import RenderService, make_server
+
+    _apply_asset_path(args)
+    if not _check_backend(args.backend, None):
+        return 1
+    init_worker()
+    out = partial(print, flush=True)
+    service = RenderService(args.inputs, jobs=args.jobs, backend=args.backend, cache_bytes=parse_size(args.cache_size))
+    try:
+        server = make_server(service, args.host, args.port, verbose=args.verbose)
+    except OSError as e:
+        print(f"Could not listen on {args.host}:{args.port}: {e}")
+        return 1
+    service.start()
+    host, port = server.server_address[:2]
+    out(f"Serving {len(service.names())} decorations on http://{host}:{port} with {service.jobs} workers, "
+        "press Ctrl+C to stop")
+    # Stopped with SIGTERM too, so service managers shut the workers down cleanly
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+def run_rack(args):
+    from .components.batch_renderer import collect_decorations, init_worker
+    from .components.rack_composer import RackComposer
+
+    decorations = collect_decorations(args.inputs)
+    if not decorations:
+        print("No decoration files found.")
+        return 1
+    if not _parse_sizes([args.size]) or not _check_backend(args.backend, [args.size]):
+        return 1
+    init_worker()
+    composer = RackComposer(decorations, columns=args.columns, size=args.size, spacing=args.spacing,
+                            frame=args.frame, background=args.background, backend=args.backend)
+    try:
+        summary = composer.write_png(args.output)
+    except (OSError, ValueError) as e:
+        print(f"Could not write rack: {e}")
+        return 1
+    print(f"Wrote a {summary['width']}x{summary['height']} rack of {summary['ribbons']} ribbons to {args.output} "
+          f"({summary['rendered']} rendered, {summary['reused']} reused)")
+    return 0
+
+
+def run_library(args):
+    from .components.ribbon_library import RibbonLibrary, pack_folder, unpack_library
+
+    try:
+        if args.action == 'pack':
+            count = pack_folder(args.source, args.target)
+            print(f"Packed {count} decorations into {args.target}")
+        elif args.action == 'unpack':
+            count = unpack_library(args.source, args.target)
+            print(f"Unpacked {count} decorations into {args.target}")
+        else:
+            with RibbonLibrary(args.source) as library:
+                names = library.search(args.target) if args.target else library.names()
+                for name in names:
+                    print(f"{name}: {library.info(name).get('name', '')}")
+    except (OSError, ValueError) as e:
+        print(f"Could not {args.action} {args.source}: {e}")
+        return 1
+    return 0
+
+
+def run_cache(args):
+    from .components.render_cache import RenderCache, default_cache_dir, parse_size
+
+    cache = RenderCache(args.dir or default_cache_dir())
+    if args.action == 'prune':
+        removed = cache.prune(parse_size(args.max_size) if args.max_size else None)
+        print(f"Removed {removed} cached renders")
+    elif args.action == 'clear':
+        removed = cache.clear()
+        print(f"Removed {removed} cached renders")
+    stats = cache.stats()
+    print(f"{stats['directory']}: {stats['entries']} renders, {stats['bytes'] / 1024 / 1024:.1f} MiB "
+          f"(limit {stats['max_bytes'] / 1024 / 1024:.0f} MiB)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ribbons-of-democracy',
+                                     description="Headless tools for Ribbons of Democracy decorations.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    render_parser = subparsers.add_parser('render', help="Render decoration JSON files to PNG without opening the designer")
+    render_parser.add_argument('inputs', nargs='+', help="Decoration JSON files or directories containing them")
+    render_parser.add_argument('-o', '--output', required=True, help="Directory to write the PNG files to")
+    render_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                               help="Number of worker processes (default: all cores)")
+    render_parser.add_argument('--backend', choices=BACKENDS, default='qpainter',
+                               help="Raster backend for background, stripes and texture (default: qpainter)")
+    render_parser.add_argument('-s', '--size', action='append',
+                               help=f"Output size: {', '.join(EXPORT_PRESETS)}, a scale such as 2x, or WIDTHxHEIGHT. "
+                                    "Repeat to write several sizes per ribbon in one pass (default: game)")
+    render_parser.add_argument('--no-cache', action='store_true', help="Render everything, ignoring the render cache")
+    render_parser.add_argument('--assets', action='append',
+                               help="Extra asset folder with standard_devices, logo or frames subfolders. Repeatable; "
+                                    "devices missing from a decoration's saved path are found there by name")
+    render_parser.set_defaults(func=run_render)
+
+    watch_parser = subparsers.add_parser('watch', help="Keep rendered PNGs up to date while decorations and assets are edited")
+    watch_parser.add_argument('folder', nargs='?', default='decorations', help="Decorations folder (default: decorations)")
+    watch_parser.add_argument('-o', '--output', required=True, help="Directory to write the PNG files to")
+    watch_parser.add_argument('-s', '--size', action='append', help="Output size, as for render. Repeatable")
+    watch_parser.add_argument('--backend', choices=BACKENDS, default='qpainter')
+    watch_parser.add_argument('--no-cache', action='store_true', help="Render everything, ignoring the render cache")
+    watch_parser.add_argument('--assets', action='append', help="Extra asset folder to read and watch, as for render")
+    watch_parser.add_argument('--interval', type=float, default=0.25, help="Seconds between checks (default: 0.25)")
+    watch_parser.add_argument('--debounce', type=float, default=0.5,
+                              help="Seconds without changes before re-rendering (default: 0.5)")
+    watch_parser.set_defaults(func=run_watch)
+
+    serve_parser = subparsers.add_parser('serve', help="Serve rendered ribbon PNGs over HTTP from a local render service")
+    serve_parser.add_argument('inputs', nargs='*', default=['decorations'],
+                              help="Decoration folders, JSON files or .rodlib libraries to serve by name (default: decorations)")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8765, help="Port to listen on, 0 for any free port (default: 8765)")
+    serve_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                              help="Number of render worker processes (default: all cores)")
+    serve_parser.add_argument('--backend', choices=BACKENDS, default='qpainter')
+    serve_parser.add_argument('--cache-size', default='64M', help="Memory for cached PNG responses (default: 64M)")
+    serve_parser.add_argument('--assets', action='append', help="Extra asset folder, as for render")
+    serve_parser.add_argument('-v', '--verbose', action='store_true', help="Log every request")
+    serve_parser.set_defaults(func=run_serve)
+
+    rack_parser = subparsers.add_parser('rack', help="Compose decorations into one ribbon rack PNG")
+    rack_parser.add_argument('inputs', nargs='+',
+                             help="Decoration JSON files, folders or libraries, highest precedence first")
+    rack_parser.add_argument('-o', '--output', required=True, help="PNG file to write")
+    rack_parser.add_argument('-c', '--columns', type=int, default=3, help="Ribbons per row (default: 3)")
+    rack_parser.add_argument('-s', '--size', default='thumbnail', help="Size of each ribbon (default: thumbnail)")
+    rack_parser.add_argument('--spacing', type=int, default=4, help="Pixels between ribbons (default: 4)")
+    rack_parser.add_argument('--frame', choices=('gold', 'silver'), help="Draw this frame around every ribbon")
+    rack_parser.add_argument('--background', default='#00000000', help="Background colour (default: transparent)")
+    rack_parser.add_argument('--backend', choices=BACKENDS, default='qpainter')
+    rack_parser.set_defaults(func=run_rack)
+
+    library_parser = subparsers.add_parser('library', help="Pack, unpack or list single-file decoration libraries")
+    library_parser.add_argument('action', choices=('pack', 'unpack', 'list'))
+    library_parser.add_argument('source', help="Decorations folder to pack, or library file to unpack or list")
+    library_parser.add_argument('target', nargs='?',
+                                help="Library file to write, folder to unpack into, or search text for list")
+    library_parser.set_defaults(func=run_library)
+
+    cache_parser = subparsers.add_parser('cache', help="Inspect or prune the on-disk render cache")
+    cache_parser.add_argument('action', choices=('stats', 'prune', 'clear'))
+    cache_parser.add_argument('--max-size', help="Size to prune down to, such as 200M (default: the cache limit)")
+    cache_parser.add_argument('--dir', help="Cache directory (default: the user cache directory)")
+    cache_parser.set_defaults(func=run_cache)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'library' and args.action != 'list' and not args.target:
+        parser.error(f"library {args.action} needs a target")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
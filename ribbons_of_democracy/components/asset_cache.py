@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import Qt
+
+# Bounded LRU of decoded asset images and their scaled variants, keyed by path
+# and file mtime so an edited PNG is picked up on its own. Paths are made
+# absolute first, so a relative path and the catalog's path for the same file
+# share entries and one invalidate() covers both. The mtime itself is
+# only re-checked every revalidate_interval seconds, which keeps redraws of
+# unchanged assets off the disk entirely.
+class AssetCache:
+    def __init__(self, max_images=64, max_scaled=256, revalidate_interval=2.0):
+        self.max_images = max_images
+        self.max_scaled = max_scaled
+        self.revalidate_interval = revalidate_interval
+        self._images = OrderedDict()
+        self._scaled = OrderedDict()
+        self._mtimes = {}
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = {'image': 0, 'scaled': 0}
+        self.misses = {'image': 0, 'scaled': 0}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'images': len(self._images),
+                'scaled': len(self._scaled),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._scaled.clear()
+            self._mtimes.clear()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def invalidate(self, path):
+        with self._lock:
+            self._mtimes.pop(self._key(path), None)
+
+    def _mtime(self, path):
+        # path is already a key
+        now = time.monotonic()
+        cached = self._mtimes.get(path)
+        if cached is not None and now - cached[1] < self.revalidate_interval:
+            return cached[0]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        self._mtimes[path] = (mtime, now)
+        return mtime
+
+    def image(self, path):
+        path = self._key(path)
+        with self._lock:
+            key = (path, self._mtime(path))
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits['image'] += 1
+                return image
+            self.misses['image'] += 1
+            image = QImage(path) if key[1] is not None else QImage()
+            if not image.isNull():
+                image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            self._images[key] = image
+            while len(self._images) > self.max_images:
+                self._images.popitem(last=False)
+            return image
+
+    def scaled(self, path, width, height, aspect_mode=Qt.AspectRatioMode.KeepAspectRatio):
+        path = self._key(path)
+        with self._lock:
+            key = (path, self._mtime(path), width, height, aspect_mode)
+            image = self._scaled.get(key)
+            if image is not None:
+                self._scaled.move_to_end(key)
+                self.hits['scaled'] += 1
+                return image
+            self.misses['scaled'] += 1
+            source = self.image(path)
+            if source.isNull() or width <= 0 or height <= 0:
+                image = QImage()
+            else:
+                image = source.scaled(width, height, aspect_mode, Qt.TransformationMode.SmoothTransformation)
+            self._scaled[key] = image
+            while len(self._scaled) > self.max_scaled:
+                self._scaled.popitem(last=False)
+            return image
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,202 @@
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from .ribbon_model import frame_path
+
+PACKAGE_DIR = Path(__file__).parent.parent
+ASSET_PATH_ENV = 'RIBBONS_ASSET_PATH'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+MAX_INFO_PATHS = 512  # Paths whose info() result is remembered between revalidations
+
+# Where each kind of asset lives inside an asset root
+KIND_DIRS = {
+    'devices': 'standard_devices',
+    'logos': 'logo',
+    'frames': 'frames',
+}
+
+
+def png_size(path):
+    # Width and height from the IHDR chunk, without decoding any pixels
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+@dataclass(frozen=True, slots=True)
+class Asset:
+    kind: str
+    name: str
+    path: str
+    width: int
+    height: int
+    mtime: int
+
+    @property
+    def aspect_ratio(self):
+        return self.width / self.height if self.height else 1.0
+
+    def to_dict(self):
+        return {'name': self.name, 'path': self.path, 'width': self.width, 'height': self.height}
+
+
+def default_roots():
+    # The package's own assets first, then any extra roots from the environment
+    roots = [PACKAGE_DIR]
+    roots.extend(Path(root) for root in os.environ.get(ASSET_PATH_ENV, '').split(os.pathsep) if root)
+    return roots
+
+
+# Index of every device, logo and frame PNG under a list of asset roots. Each
+# directory is only rescanned when its mtime changes, and within a rescan only
+# files whose mtime changed have their header read again. Later roots take
+# precedence, so a custom pack can replace a standard device of the same name.
+class AssetCatalog:
+    def __init__(self, roots=None, revalidate_interval=2.0):
+        # Absolute, like the paths the watcher invalidates
+        self.roots = [Path(os.path.abspath(root)) for root in (roots if roots is not None else default_roots())]
+        self.revalidate_interval = revalidate_interval
+        self._dirs = {}
+        self._index = {kind: {} for kind in KIND_DIRS}
+        self._paths = {}
+        self._info = OrderedDict()  # Path to (asset or None, when it was last checked)
+        self._checked = None
+        self._lock = threading.RLock()
+
+    def add_root(self, root):
+        with self._lock:
+            root = Path(os.path.abspath(root))
+            if root not in self.roots:
+                self.roots.append(root)
+                self._checked = None
+
+    def invalidate(self, path):
+        # Forget what is known about the directory holding path, for changes
+        # made in place, which leave the directory mtime alone
+        with self._lock:
+            path = os.path.abspath(path)
+            self._dirs.pop(Path(path).parent, None)
+            self._info.pop(path, None)
+            self._checked = None
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked is not None and now - self._checked < self.revalidate_interval:
+                return
+            self._checked = now
+            changed = False
+            for root in self.roots:
+                for kind, subdir in KIND_DIRS.items():
+                    changed |= self._scan(kind, root / subdir)
+            if changed:
+                self._rebuild()
+
+    def _scan(self, kind, directory):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return self._dirs.pop(directory, None) is not None
+        cached = self._dirs.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return False
+
+        previous = cached[1] if cached else {}
+        assets = {}
+        for entry in os.scandir(directory):
+            if not entry.name.lower().endswith('.png') or not entry.is_file():
+                continue
+            file_mtime = entry.stat().st_mtime_ns
+            asset = previous.get(entry.name)
+            if asset is None or asset.mtime != file_mtime:
+                asset = self._read(kind, entry.path, file_mtime)
+            if asset is not None:
+                assets[entry.name] = asset
+        self._dirs[directory] = (mtime, assets)
+        return True
+
+    def _read(self, kind, path, mtime, warn=True):
+        size = png_size(path)
+        if size is None or 0 in size:
+            if warn:
+                print(f"Warning: {path} is not a valid PNG file, skipping")
+            return None
+        return Asset(kind, Path(path).stem, str(path), size[0], size[1], mtime)
+
+    def _rebuild(self):
+        index = {kind: {} for kind in KIND_DIRS}
+        for root in self.roots:
+            for kind, subdir in KIND_DIRS.items():
+                cached = self._dirs.get(root / subdir)
+                if cached:
+                    for asset in sorted(cached[1].values(), key=lambda asset: asset.name):
+                        index[kind][asset.name] = asset
+        self._index = index
+        self._paths = {asset.path: asset for assets in index.values() for asset in assets.values()}
+
+    def get(self, kind, name):
+        self.refresh()
+        return self._index[kind].get(name)
+
+    def assets(self, kind):
+        self.refresh()
+        return list(self._index[kind].values())
+
+    def devices(self):
+        return self.assets('devices')
+
+    def info(self, path):
+        # Metadata for any PNG, catalogued or not (such as a logo picked from
+        # disk). Returns None for missing files and other image formats. Like
+        # the asset cache, a path is only stat'ed again once the revalidation
+        # interval has passed, so layouts of unchanged assets stay off the disk.
+        self.refresh()
+        path = os.path.abspath(path)
+        with self._lock:
+            now = time.monotonic()
+            cached = self._info.get(path)
+            if cached is not None and now - cached[1] < self.revalidate_interval:
+                self._info.move_to_end(path)
+                return cached[0]
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                asset = None
+            else:
+                asset = self._paths.get(path) or (cached[0] if cached is not None else None)
+                if asset is None or asset.mtime != mtime:
+                    asset = self._read('other', path, mtime, warn=False)
+            self._info[path] = (asset, now)
+            self._info.move_to_end(path)
+            while len(self._info) > MAX_INFO_PATHS:
+                self._info.popitem(last=False)
+            return asset
+
+    def frame_path(self, frame_type):
+        frame = self.get('frames', f"{frame_type.capitalize()}-Frame")
+        return frame.path if frame else frame_path(frame_type)
+
+    def resolve_device(self, path, name=''):
+        # Finds a device image that was moved, or saved on another machine,
+        # by the file name it had there or failing that its display name
+        if path and os.path.exists(path):
+            return path
+        stem = Path(path.replace('\\', '/')).stem if path else ''
+        asset = self.get('devices', stem) or self.get('devices', name)
+        return asset.path if asset else path
+
+    def stats(self):
+        self.refresh()
+        return {kind: len(assets) for kind, assets in self._index.items()}
+
+
+asset_catalog = AssetCatalog()
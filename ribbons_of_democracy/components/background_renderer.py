@@ -0,0 +1,77 @@
+import time
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+from .layered_renderer import LayeredRenderer
+from .ribbon_drawer import RIBBON_WIDTH, RIBBON_HEIGHT
+from .render_metrics import render_metrics
+
+
+class _RenderJob(QRunnable):
+    def __init__(self, owner, generation, snapshot):
+        super().__init__()
+        self.owner, self.generation, self.snapshot = owner, generation, snapshot
+
+    def run(self):
+        start = time.perf_counter()
+        renderer = self.owner.renderer
+        try:
+            image = renderer.render(self.snapshot, draw_outline=self.owner.draw_outline).copy()
+            dirty = renderer.last_dirty
+            render_metrics.record('render', time.perf_counter() - start)
+        except Exception as e:
+            # The owner must still hear back, or it would wait on this job forever
+            print(f"Warning: Background render failed: {e}")
+            renderer.invalidate()
+            image, dirty = QImage(), None
+        self.owner._finished.emit(self.generation, image, dirty)
+
+
+# Renders snapshots of a RibbonData on a thread pool, so smooth-scaling large
+# assets never blocks the GUI thread. Each submit() is numbered with a new
+# generation. One frame renders at a time, into a LayeredRenderer whose layers
+# persist between frames; a snapshot still waiting for it is dropped when a
+# newer one is submitted, so after a burst of edits only the latest is drawn.
+# frame_ready delivers each frame on the GUI thread, in generation order, with
+# the area that changed since the frame before it.
+class BackgroundRenderer(QObject):
+    frame_ready = pyqtSignal(int, QImage, object)
+    _finished = pyqtSignal(int, QImage, object)
+
+    def __init__(self, width=RIBBON_WIDTH, height=RIBBON_HEIGHT, draw_outline=False, pool=None, parent=None):
+        super().__init__(parent)
+        self.renderer = LayeredRenderer(width, height)  # Only touched by the running job
+        self.draw_outline = draw_outline
+        self.pool = pool or QThreadPool.globalInstance()
+        self.generation = 0  # Latest submitted
+        self.shown = 0  # Latest delivered
+        self.dropped = 0
+        self._pending = None
+        self._running = False
+        self._finished.connect(self._deliver)
+
+    @property
+    def busy(self):
+        return self._running or self._pending is not None
+
+    def submit(self, ribbon_data):
+        self.generation += 1
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = (self.generation, ribbon_data.snapshot())
+        if not self._running:
+            self._start()
+        return self.generation
+
+    def _start(self):
+        generation, snapshot = self._pending
+        self._pending = None
+        self._running = True
+        self.pool.start(_RenderJob(self, generation, snapshot))
+
+    def _deliver(self, generation, image, dirty):
+        self._running = False
+        if self._pending is not None:
+            self._start()
+        self.shown = generation
+        if not image.isNull():
+            self.frame_ready.emit(generation, image, dirty)
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from .ribbon_library import LIBRARY_EXTENSION, RibbonLibrary
+
+_worker_app = None
+
+
+# A decoration is either a JSON file path or a (library path, entry name) pair
+def collect_decorations(inputs):
+    decorations = []
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            decorations.extend(sorted(path.glob('*.json')))
+        elif path.is_file() and path.suffix == LIBRARY_EXTENSION:
+            with RibbonLibrary(path) as library:
+                decorations.extend((str(path), name) for name in library.names())
+        elif path.is_file():
+            decorations.append(path)
+        else:
+            print(f"Warning: {entry} is not a file or directory, skipping")
+    return decorations
+
+
+def decoration_name(decoration):
+    if isinstance(decoration, tuple):
+        return decoration[1]
+    return Path(decoration).stem
+
+
+def output_path_for(decoration, output_dir, size=None):
+    suffix = f"@{size}" if size else ''
+    return Path(output_dir) / f"{decoration_name(decoration)}{suffix}.png"
+
+
+def render_outputs(decoration, output_dir, sizes=None):
+    # What render_one writes for a decoration: one PNG, or a (PNG, size) pair per size
+    if sizes and len(sizes) > 1:
+        return [(output_path_for(decoration, output_dir, size), size) for size in sizes]
+    if sizes:
+        return [(output_path_for(decoration, output_dir), sizes[0])]
+    return output_path_for(decoration, output_dir)
+
+
+def load_decoration(decoration):
+    from .ribbon_data import RibbonData
+
+    ribbon_data = RibbonData()
+    if isinstance(decoration, tuple):
+        ribbon_data.load_from_library(*decoration)
+    else:
+        ribbon_data.load_from_file(str(decoration))
+    return ribbon_data
+
+
+def init_worker():
+    # Every worker needs its own GUI application for QPixmap, but never a window
+    global _worker_app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtGui import QGuiApplication
+    _worker_app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def render_one(decoration, outputs, backend='qpainter', use_cache=True, ribbon_data=None):
+    # outputs is either one PNG path or a list of (PNG path, size) pairs;
+    # ribbon_data, if given, is the decoration already loaded
+    from .ribbon_drawer import RibbonDrawer
+
+    start = time.perf_counter()
+    label = ':'.join(decoration) if isinstance(decoration, tuple) else str(decoration)
+    try:
+        if ribbon_data is None:
+            ribbon_data = load_decoration(decoration)
+        if isinstance(outputs, list):
+            written = RibbonDrawer.export_pngs(ribbon_data, [(str(path), size) for path, size in outputs], backend,
+                                               cache=None if use_cache else False)
+        else:
+            written = RibbonDrawer.save_as_png(ribbon_data, str(outputs), backend, cache=None if use_cache else False)
+        if not written:
+            raise OSError(f"Could not write the PNG output for {label}")
+    except Exception as e:
+        return label, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return label, time.perf_counter() - start, None
+
+
+def render_batch(decorations, output_dir, jobs=None, progress=print, backend='qpainter', sizes=None, use_cache=True):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(decorations) or 1))
+    tasks = [(path, render_outputs(path, output_dir, sizes)) for path in decorations]
+
+    results = []
+    start = time.perf_counter()
+    if jobs == 1:
+        init_worker()
+        for path, png_path in tasks:
+            results.append(render_one(path, png_path, backend, use_cache))
+    else:
+        # Spawn rather than fork so no worker inherits Qt state from the parent
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=init_worker) as pool:
+            futures = {pool.submit(render_one, path, png_path, backend, use_cache): path for path, png_path in tasks}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    results.append((str(decoration_name(futures[future])), 0.0, traceback.format_exc(limit=1).strip()))
+    elapsed = time.perf_counter() - start
+
+    failures = [(path, error) for path, _, error in results if error]
+    summary = {
+        'total': len(tasks),
+        'rendered': len(tasks) - len(failures),
+        'failed': failures,
+        'jobs': jobs,
+        'elapsed': elapsed,
+        'per_second': len(tasks) / elapsed if elapsed > 0 else 0.0,
+        'render_time': sum(duration for _, duration, _ in results),
+    }
+    if progress:
+        print_summary(summary, progress)
+    return summary
+
+
+def print_summary(summary, out=print):
+    out(f"Rendered {summary['rendered']}/{summary['total']} ribbons in {summary['elapsed']:.2f}s "
+        f"({summary['per_second']:.1f} ribbons/s, {summary['jobs']} workers)")
+    if summary['total']:
+        out(f"Average render time per ribbon: {summary['render_time'] / summary['total'] * 1000:.1f}ms")
+    if summary['failed']:
+        out(f"{len(summary['failed'])} failed:")
+        for path, error in summary['failed']:
+            out(f"  {path}: {error}")
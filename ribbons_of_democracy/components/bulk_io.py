@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError, as_completed
+from pathlib import Path
+from PyQt6.QtCore import QObject, QBuffer, QByteArray, QIODevice, pyqtSignal
+
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) + 2)  # Threads, so some can wait on disk while others work
+
+
+class Cancelled(Exception):
+    pass
+
+
+def write_atomic(path, data):
+    # Written next to the target and renamed over it, so an interrupted write
+    # leaves either the old file or the complete new one, never part of one
+    path = str(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                     dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def encode_png(image):
+    data = QByteArray()  # Kept referenced, the buffer does not own it
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not image.save(buffer, "PNG"):
+        raise OSError("Could not encode the PNG")
+    buffer.close()
+    return bytes(data)
+
+
+def _run_pipelined(items, work, label, progress=None, cancel=None, jobs=None):
+    # Runs work(item) for every item on a thread pool, so reading, parsing,
+    # rendering and writing of different files overlap. Returns the results in
+    # item order (None where the item failed or was cancelled) and a list of
+    # (label, error) pairs. Items not started when cancel is set are skipped.
+    results = [None] * len(items)
+    errors = []
+    done = 0
+
+    def guarded(item):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        return work(item)
+
+    with ThreadPoolExecutor(max_workers=jobs or DEFAULT_JOBS) as pool:
+        futures = {pool.submit(guarded, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except (Cancelled, CancelledError):
+                continue
+            except Exception as e:
+                errors.append((label(items[index]), f"{type(e).__name__}: {e}"))
+            done += 1
+            if progress:
+                progress(done, len(items), label(items[index]))
+            if cancel is not None and cancel.is_set():
+                for pending in futures:
+                    pending.cancel()
+    return results, errors
+
+
+def _load(path):
+    from .ribbon_data import RibbonData
+
+    with open(path, 'rb') as file:
+        data = json.loads(file.read())
+    ribbon_data = RibbonData()
+    ribbon_data.load_from_dict(data, os.path.dirname(str(path)))
+    return ribbon_data
+
+
+def import_folder(folder, progress=None, cancel=None, jobs=None):
+    # Loads and validates every decoration JSON in folder. The summary lists
+    # the loaded (name, RibbonData) pairs in file name order and every file
+    # that could not be loaded, with the reason.
+    start = time.perf_counter()
+    paths = sorted(Path(folder).glob('*.json'))
+    results, errors = _run_pipelined(paths, _load, lambda path: path.name, progress, cancel, jobs)
+    decorations = [(path.stem, ribbon_data) for path, ribbon_data in zip(paths, results) if ribbon_data is not None]
+    return {
+        'total': len(paths),
+        'done': len(decorations),
+        'failed': errors,
+        'cancelled': bool(cancel is not None and cancel.is_set()),
+        'elapsed': time.perf_counter() - start,
+        'decorations': decorations,
+    }
+
+
+def _unique_names(names):
+    seen = {}
+    unique = []
+    for name in names:
+        count = seen.get(name.casefold(), 0) + 1
+        seen[name.casefold()] = count
+        unique.append(name if count == 1 else f"{name} ({count})")
+    return unique
+
+
+def export_ribbons(ribbons, folder, png=True, progress=None, cancel=None, jobs=None):
+    # Writes <name>.json, and <name>.png unless png is False, for every
+    # (name, RibbonData) pair. Each file is replaced atomically. The ribbons
+    # are read from worker threads, so pass snapshots of any being edited.
+    from .ribbon_drawer import RibbonDrawer
+
+    start = time.perf_counter()
+    os.makedirs(folder, exist_ok=True)
+    items = list(zip(_unique_names([name for name, _ in ribbons]), (ribbon_data for _, ribbon_data in ribbons)))
+
+    def export(item):
+        name, ribbon_data = item
+        base = os.path.join(folder, name)
+        write_atomic(f"{base}.json", json.dumps(ribbon_data.to_json_dict(folder)).encode('utf-8'))
+        if png:
+            write_atomic(f"{base}.png", encode_png(RibbonDrawer.render_image(ribbon_data)))
+        return True
+
+    results, errors = _run_pipelined(items, export, lambda item: item[0], progress, cancel, jobs)
+    return {
+        'total': len(items),
+        'done': sum(1 for written in results if written),
+        'failed': errors,
+        'cancelled': bool(cancel is not None and cancel.is_set()),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+# Runs import_folder or export_ribbons on a background thread and reports
+# back through signals, which are delivered on the thread that owns this
+# object, so GUI code can connect to them directly.
+class BulkTask(QObject):
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(object)
+
+    def __init__(self, function, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            summary = self._function(*self._args, progress=self.progress.emit, cancel=self._cancel, **self._kwargs)
+        except Exception as e:
+            summary = {'total': 0, 'done': 0, 'failed': [('', f"{type(e).__name__}: {e}")],
+                       'cancelled': False, 'elapsed': 0.0}
+        self.finished.emit(summary)
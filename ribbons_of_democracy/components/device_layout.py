@@ -0,0 +1,78 @@
+from functools import lru_cache
+from .asset_catalog import asset_catalog
+from .ribbon_model import RIBBON_WIDTH, RIBBON_HEIGHT
+
+MAX_DEVICES_WIDTH = 0.8  # Devices may take up 80% of the ribbon width
+
+
+def layout_devices(devices, ribbon_width, ribbon_height):
+    # Returns one (x, y, width, height) rectangle per device, in drawing order.
+    # Only the device sizes affect the layout, so that is all the memo keys on;
+    # devices moved by hand are then shifted by their offsets.
+    rects = _layout(tuple((device.width, device.height) for device in devices), ribbon_width, ribbon_height)
+    if any(device.offset_x or device.offset_y for device in devices):
+        return tuple((x + device.offset_x, y + device.offset_y, width, height)
+                     for device, (x, y, width, height) in zip(devices, rects))
+    return rects
+
+
+def layout_bounds(rects):
+    if not rects:
+        return None
+    left = min(x for x, _, _, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    right = max(x + w for x, _, w, _ in rects)
+    bottom = max(y + h for _, y, _, h in rects)
+    return left, top, right - left, bottom - top
+
+
+def _aspect_ratio(path):
+    # PNGs are measured from their header; other formats have to be decoded
+    info = asset_catalog.info(path)
+    if info is not None:
+        return info.aspect_ratio
+    from .asset_cache import asset_cache  # Decodes with Qt, so only loaded for non-PNG logos
+
+    image = asset_cache.image(path)
+    return None if image.isNull() or not image.height() else image.width() / image.height()
+
+
+def logo_rect(ribbon):
+    # Where the logo is drawn in ribbon coordinates, or None without a usable logo
+    if not ribbon.logo:
+        return None
+    aspect_ratio = _aspect_ratio(ribbon.logo)
+    if aspect_ratio is None:
+        return None
+    logo_height = RIBBON_HEIGHT - 40  # 20 pixels from top and bottom
+    logo_width = int(logo_height * aspect_ratio)
+    offset_x, offset_y = ribbon.logo_offset
+    return (RIBBON_WIDTH - logo_width) // 2 + offset_x, 20 + offset_y, logo_width, logo_height
+
+
+def cache_info():
+    return _layout.cache_info()
+
+
+@lru_cache(maxsize=512)
+def _layout(sizes, ribbon_width, ribbon_height):
+    total_width = sum(width for width, _ in sizes)
+    available_width = ribbon_width * MAX_DEVICES_WIDTH
+    if total_width > available_width:
+        scale_factor = available_width / total_width
+        sizes = [(int(width * scale_factor), int(height * scale_factor)) for width, height in sizes]
+
+    max_height = ribbon_height // 3  # One-third of the ribbon height
+    scaled = []
+    for width, height in sizes:
+        scaled_height = min(height, max_height)
+        scaled_width = int(scaled_height * (width / height)) if height else 0
+        scaled.append((scaled_width, scaled_height))
+
+    # Centre the row on the sizes actually drawn
+    x_offset = (ribbon_width - sum(width for width, _ in scaled)) // 2
+    rects = []
+    for width, height in scaled:
+        rects.append((x_offset, (ribbon_height - height) // 2, width, height))
+        x_offset += width
+    return tuple(rects)
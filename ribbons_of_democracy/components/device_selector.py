@@ -1,6 +1,52 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QListWidgetItem
-from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QListView
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from .thumbnail_cache import default_thumbnail_cache, THUMBNAIL_SIZE
+
+FETCH_BATCH = 64
+
+
+# Rows are exposed in batches as the view scrolls, and each thumbnail is only
+# loaded the first time the view asks to paint its row
+class DeviceListModel(QAbstractListModel):
+    def __init__(self, devices, thumbnails=None, parent=None):
+        super().__init__(parent)
+        self.devices = list(devices)
+        self.thumbnails = thumbnails or default_thumbnail_cache()
+        self.loaded = 0
+        self._icons = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.devices)
+
+    def fetchMore(self, parent):
+        count = min(FETCH_BATCH, len(self.devices) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        device = self.devices[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return device['name']
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon(index.row())
+        if role == Qt.ItemDataRole.UserRole:
+            return device
+        return None
+
+    def icon(self, row):
+        icon = self._icons.get(row)
+        if icon is None:
+            icon = QIcon(QPixmap.fromImage(self.thumbnails.thumbnail(self.devices[row]['path'])))
+            self._icons[row] = icon
+        return icon
+
 
 class DeviceSelector(QDialog):
     def __init__(self, parent, available_devices):
@@ -10,14 +56,14 @@ class DeviceSelector(QDialog):
         self.selected_device = None
 
         layout = QVBoxLayout(self)
-        
-        self.device_list = QListWidget()
-        for device in available_devices:
-            item = QListWidgetItem(device['name'])
-            item.setIcon(QIcon(device['path']))
-            item.setData(Qt.ItemDataRole.UserRole, device)
-            self.device_list.addItem(item)
-        
+
+        self.device_list = QListView()
+        self.device_list.setUniformItemSizes(True)  # Lets the view size rows without asking for every icon
+        self.device_list.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.device_model = DeviceListModel(available_devices, parent=self)
+        self.device_list.setModel(self.device_model)
+        self.device_list.doubleClicked.connect(self.select_device)
+
         layout.addWidget(self.device_list)
 
         button_layout = QHBoxLayout()
@@ -31,7 +77,7 @@ class DeviceSelector(QDialog):
         layout.addLayout(button_layout)
 
     def select_device(self):
-        current_item = self.device_list.currentItem()
-        if current_item:
-            self.selected_device = current_item.data(Qt.ItemDataRole.UserRole)
+        current_index = self.device_list.currentIndex()
+        if current_index.isValid():
+            self.selected_device = current_index.data(Qt.ItemDataRole.UserRole)
             self.accept()
@@ -0,0 +1,205 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import fields, is_dataclass
+
+DEFAULT_HISTORY_BUDGET = 1024 * 1024  # bytes
+MERGE_WINDOW = 0.5  # seconds between edits that still count as one drag
+
+
+def approx_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(v) for v in value)
+    elif is_dataclass(value):
+        size += sum(approx_size(getattr(value, f.name)) for f in fields(value))
+    return size
+
+
+# Each operation is a small reversible change to one section of a ribbon, so
+# undoing or redoing it only ever touches the element it describes.
+class Operation(ABC):
+    __slots__ = ('section', 'size')
+    merge_key = None
+
+    @abstractmethod
+    def apply(self, ribbon_data):
+        pass
+
+    @abstractmethod
+    def revert(self, ribbon_data):
+        pass
+
+    def merge(self, other):
+        return False
+
+
+class ListInsert(Operation):
+    __slots__ = ('key', 'index', 'item')
+
+    def __init__(self, key, index, item, section=None):
+        self.key, self.index, self.item = key, index, item
+        self.section = section or key
+        self.size = approx_size(item) + 64
+
+    def apply(self, ribbon_data):
+        getattr(ribbon_data.ribbon, self.key).insert(self.index, self.item)
+        ribbon_data.touch(self.section)
+
+    def revert(self, ribbon_data):
+        del getattr(ribbon_data.ribbon, self.key)[self.index]
+        ribbon_data.touch(self.section)
+
+
+class ListRemove(ListInsert):
+    __slots__ = ()
+
+    def apply(self, ribbon_data):
+        ListInsert.revert(self, ribbon_data)
+
+    def revert(self, ribbon_data):
+        ListInsert.apply(self, ribbon_data)
+
+
+class ListReplace(Operation):
+    __slots__ = ('key', 'index', 'before', 'after')
+
+    def __init__(self, key, index, before, after, section=None):
+        self.key, self.index, self.before, self.after = key, index, before, after
+        self.section = section or key
+        self.size = approx_size(before) + approx_size(after) + 64
+
+    @property
+    def merge_key(self):
+        return (type(self), self.key, self.index)
+
+    def apply(self, ribbon_data):
+        getattr(ribbon_data.ribbon, self.key)[self.index] = self.after
+        ribbon_data.touch(self.section)
+
+    def revert(self, ribbon_data):
+        getattr(ribbon_data.ribbon, self.key)[self.index] = self.before
+        ribbon_data.touch(self.section)
+
+    def merge(self, other):
+        self.after = other.after
+        self.size = approx_size(self.before) + approx_size(self.after) + 64
+        return True
+
+
+class SetValue(Operation):
+    __slots__ = ('key', 'before', 'after')
+
+    def __init__(self, key, before, after, section=None):
+        self.key, self.before, self.after = key, before, after
+        self.section = section or key
+        self.size = approx_size(before) + approx_size(after) + 64
+
+    @property
+    def merge_key(self):
+        return (type(self), self.key)
+
+    def apply(self, ribbon_data):
+        ribbon_data.ribbon.set(self.key, self.after)
+        ribbon_data.touch(self.section)
+
+    def revert(self, ribbon_data):
+        ribbon_data.ribbon.set(self.key, self.before)
+        ribbon_data.touch(self.section)
+
+    def merge(self, other):
+        self.after = other.after
+        self.size = approx_size(self.before) + approx_size(self.after) + 64
+        return True
+
+
+class ReplaceRibbon(Operation):
+    __slots__ = ('before', 'after')
+
+    def __init__(self, before, after):
+        # Swapping whole ribbons keeps clear() undoable in constant time
+        self.before, self.after = before, after
+        self.section = None
+        self.size = approx_size(before) + approx_size(after) + 64
+
+    def apply(self, ribbon_data):
+        ribbon_data.ribbon = self.after
+        ribbon_data.touch_all()
+
+    def revert(self, ribbon_data):
+        ribbon_data.ribbon = self.before
+        ribbon_data.touch_all()
+
+
+class History:
+    def __init__(self, budget=DEFAULT_HISTORY_BUDGET, merge_window=MERGE_WINDOW):
+        self.budget = budget
+        self.merge_window = merge_window
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+        self._last_record = 0.0
+        self._sealed = True
+
+    @property
+    def memory_used(self):
+        return self._bytes
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._sealed = True
+
+    def seal(self):
+        # The next recorded operation starts a new undo step even if it could merge
+        self._sealed = True
+
+    def record(self, operation, merge=False):
+        now = time.monotonic()
+        for redo_operation in self._redo:
+            self._bytes -= redo_operation.size
+        self._redo.clear()
+
+        last = self._undo[-1] if self._undo else None
+        if merge and not self._sealed and last is not None and \
+                now - self._last_record <= self.merge_window and \
+                last.merge_key is not None and last.merge_key == operation.merge_key:
+            self._bytes -= last.size
+            last.merge(operation)
+            self._bytes += last.size
+        else:
+            self._undo.append(operation)
+            self._bytes += operation.size
+        self._sealed = not merge
+        self._last_record = now
+
+        while self._bytes > self.budget and len(self._undo) > 1:
+            self._bytes -= self._undo.popleft().size
+
+    def undo(self, ribbon_data):
+        if not self._undo:
+            return False
+        operation = self._undo.pop()
+        operation.revert(ribbon_data)
+        self._redo.append(operation)
+        self._sealed = True
+        return True
+
+    def redo(self, ribbon_data):
+        if not self._redo:
+            return False
+        operation = self._redo.pop()
+        operation.apply(ribbon_data)
+        self._undo.append(operation)
+        self._sealed = True
+        return True
@@ -0,0 +1,132 @@
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import Qt, QRect
+from .ribbon_drawer import RibbonDrawer, RIBBON_WIDTH, RIBBON_HEIGHT, _scale_span
+from .device_layout import layout_bounds
+
+# Layers in compositing order, with the RibbonData sections each one depends on
+LAYERS = (
+    ('stripes', ('background', 'stripes')),
+    ('texture', ('texture',)),
+    ('devices', ('devices',)),
+    ('logo', ('logo',)),
+    ('frame', ('frame',)),
+)
+
+# Keeps one persistent image per layer and one for the composited output.
+# After an edit only the area the ribbon data reports as damaged is cleared
+# and redrawn in the layers that depend on it, and only that area of the
+# output is composited again. last_dirty is the output area the last render
+# changed, None when it was all of it.
+class LayeredRenderer:
+    def __init__(self, width=RIBBON_WIDTH, height=RIBBON_HEIGHT):
+        self.width = width
+        self.height = height
+        self._layers = {}
+        self._output = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        self.frames = 0
+        self.last_rebuilt = ()
+        self.last_dirty = None
+        self._lineage = None
+        self._outline = None
+        self.rebuild_counts = {name: 0 for name, _ in LAYERS}
+
+    def invalidate(self):
+        self._layers.clear()
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'last_rebuilt': list(self.last_rebuilt),
+            'rebuild_counts': dict(self.rebuild_counts),
+        }
+
+    def render(self, ribbon_data, draw_outline=False):
+        if ribbon_data.lineage is not self._lineage:
+            # Damage is only tracked within one RibbonData and its snapshots
+            self._layers.clear()
+            self._lineage = ribbon_data.lineage
+        rebuilt = []
+        dirty = []  # Output areas to composite again, None for all of it
+        for name, sections in LAYERS:
+            key = tuple(ribbon_data.versions[section] for section in sections)
+            cached = self._layers.get(name)
+            if cached is not None and cached[0] == key:
+                continue
+            rects = None if cached is None else ribbon_data.damage_since(dict(zip(sections, cached[0])))
+            if rects == []:
+                # Versions moved on but nothing drawn in this layer changed
+                self._layers[name] = (key, cached[1])
+                continue
+            area = None if rects is None else self._scale_rect(layout_bounds(rects))
+            layer = self._build_layer(name, ribbon_data, cached[1] if cached else None, area)
+            self._layers[name] = (key, layer)
+            self.rebuild_counts[name] += 1
+            rebuilt.append(name)
+            if dirty is not None:
+                dirty = None if area is None else dirty + [area]
+        if draw_outline != self._outline:
+            self._outline = draw_outline
+            dirty = None
+        self.last_rebuilt = tuple(rebuilt)
+        self.last_dirty = None if dirty is None else layout_bounds(dirty) or (0, 0, 0, 0)
+        self.frames += 1
+        if dirty == []:
+            return self._output
+
+        painter = QPainter(self._output)
+        if dirty is not None:
+            painter.setClipRect(QRect(*self.last_dirty))
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(0, 0, self._layers['stripes'][1])
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        for name, _ in LAYERS[1:]:
+            layer = self._layers[name][1]
+            if layer is not None:
+                painter.drawImage(0, 0, layer)
+        if draw_outline:
+            RibbonDrawer.draw_outline(painter, self.width, self.height)
+        painter.end()
+        return self._output
+
+    def _scale_rect(self, rect):
+        # Base ribbon coordinates to whole output pixels, with a pixel to spare for rounding
+        x, width = _scale_span(rect[0], rect[2], self.width / RIBBON_WIDTH)
+        y, height = _scale_span(rect[1], rect[3], self.height / RIBBON_HEIGHT)
+        area = QRect(x - 1, y - 1, width + 2, height + 2).intersected(QRect(0, 0, self.width, self.height))
+        return area.x(), area.y(), area.width(), area.height()
+
+    def _build_layer(self, name, ribbon_data, layer=None, area=None):
+        # Redraws area of the layer, or all of it when area is None or there
+        # is no image to redraw into yet
+        ribbon = ribbon_data.ribbon
+        # Empty layers are skipped entirely when compositing
+        if (name == 'texture' and not ribbon.texture_enabled) or \
+                (name == 'devices' and not ribbon.devices) or \
+                (name == 'logo' and not ribbon.logo) or \
+                (name == 'frame' and not ribbon.frame):
+            return None
+
+        if layer is None:
+            layer = QImage(self.width, self.height, QImage.Format.Format_ARGB32_Premultiplied)
+            area = None
+        painter = QPainter(layer)
+        if area is None:
+            layer.fill(Qt.GlobalColor.transparent)
+        else:
+            painter.setClipRect(QRect(*area))
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+            painter.fillRect(QRect(*area), Qt.GlobalColor.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        if name == 'stripes':
+            RibbonDrawer.draw_background(painter, ribbon_data, self.width, self.height)
+            RibbonDrawer.draw_stripes(painter, ribbon_data, self.width, self.height)
+        elif name == 'texture':
+            RibbonDrawer.apply_texture(painter, self.width, self.height)
+        elif name == 'devices':
+            RibbonDrawer.draw_devices(painter, ribbon_data, self.width, self.height)
+        elif name == 'logo':
+            RibbonDrawer.draw_logo(painter, ribbon_data, self.width, self.height)
+        elif name == 'frame':
+            RibbonDrawer.draw_frame(painter, ribbon_data, self.width, self.height)
+        painter.end()
+        return layer
@@ -0,0 +1,87 @@
+from PyQt6.QtGui import QImage, QPainter
+from .ribbon_drawer import RibbonDrawer, RIBBON_WIDTH, RIBBON_HEIGHT, TEXTURE_ALPHA
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+IMAGE_FORMAT = QImage.Format.Format_RGBA8888_Premultiplied
+
+
+def available():
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The numpy backend needs numpy, install it with 'pip install numpy'")
+
+
+def _div255(values):
+    # Same rounding as Qt's qt_div_255, so blends match the QPainter path exactly
+    values = values + 128
+    return (values + (values >> 8)) >> 8
+
+
+def _premultiplied(argb):
+    alpha = (argb >> 24) & 0xFF
+    rgb = np.array([(argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF], dtype=np.uint32)
+    return np.append(_div255(rgb * alpha), alpha).astype(np.uint8), alpha
+
+
+def image_array(image):
+    # A writable (height, width, 4) view straight onto the QImage's pixel memory
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+def fill_columns(pixels, x, width, argb):
+    x0, x1 = max(x, 0), min(x + width, pixels.shape[1])
+    if x0 >= x1:
+        return
+    color, alpha = _premultiplied(argb)
+    if alpha == 255:
+        pixels[:, x0:x1] = color
+    else:
+        region = pixels[:, x0:x1].astype(np.uint32)
+        pixels[:, x0:x1] = color + _div255(region * (255 - alpha))
+
+
+def fill_background_and_stripes(pixels, ribbon_data):
+    pixels[:] = 0
+    fill_columns(pixels, 0, pixels.shape[1], ribbon_data.ribbon.background_argb)
+    for start, end, layers in ribbon_data.stripe_runs().runs:
+        for stripe in layers:
+            fill_columns(pixels, start, end - start, stripe.argb)
+
+
+def apply_texture(pixels):
+    # Every other scanline, blended with translucent black in one operation
+    rows = pixels[::2].astype(np.uint32)
+    pixels[::2, :, :3] = _div255(rows[:, :, :3] * (255 - TEXTURE_ALPHA))
+    pixels[::2, :, 3] = TEXTURE_ALPHA + _div255(rows[:, :, 3] * (255 - TEXTURE_ALPHA))
+
+
+def render_image(ribbon_data, draw_outline=False, exclude_devices=False):
+    _require_numpy()
+    image = QImage(RIBBON_WIDTH, RIBBON_HEIGHT, IMAGE_FORMAT)
+    pixels = image_array(image)
+    ribbon = ribbon_data.ribbon
+    fill_background_and_stripes(pixels, ribbon_data)
+    if ribbon.texture_enabled:
+        apply_texture(pixels)
+    del pixels
+
+    # Devices, logo and frame are bitmap composites, which QPainter already does well
+    painter = QPainter(image)
+    if not exclude_devices:
+        RibbonDrawer.draw_devices(painter, ribbon_data, RIBBON_WIDTH, RIBBON_HEIGHT)
+    RibbonDrawer.draw_logo(painter, ribbon_data, RIBBON_WIDTH, RIBBON_HEIGHT)
+    RibbonDrawer.draw_frame(painter, ribbon_data, RIBBON_WIDTH, RIBBON_HEIGHT)
+    if draw_outline:
+        RibbonDrawer.draw_outline(painter, RIBBON_WIDTH, RIBBON_HEIGHT)
+    painter.end()
+    return image
@@ -0,0 +1,126 @@
+import os
+import struct
+import threading
+import zlib
+from PyQt6.QtGui import QImage
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+IDAT_CHUNK_BYTES = 256 * 1024
+
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+# Writes an 8-bit RGBA PNG a few rows at a time, so images far larger than
+# memory can be produced from strips. Rows must add up to exactly height.
+# Given a path, the PNG is written to a temporary file beside it and renamed
+# into place by close(), so a failed or abandoned write never leaves a
+# truncated image behind.
+class PngWriter:
+    def __init__(self, file, width, height, compression=6):
+        self._owns_file = isinstance(file, (str, bytes)) or hasattr(file, '__fspath__')
+        self.path = os.fsdecode(file) if self._owns_file else None
+        self._temp_path = None
+        if self._owns_file:
+            directory, name = os.path.split(os.path.abspath(self.path))
+            self._temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            file = open(self._temp_path, 'wb')
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._stride = width * 4
+        self._compressor = zlib.compressobj(compression)
+        self._pending = []
+        self._pending_bytes = 0
+        self.file.write(PNG_SIGNATURE)
+        self.file.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def abort(self):
+        # Stops writing and, for a path, removes the partial file
+        self._compressor = None
+        if self._owns_file and self._temp_path is not None:
+            self.file.close()
+            try:
+                os.unlink(self._temp_path)
+            except OSError:
+                pass
+            self._temp_path = None
+
+    def write_rows(self, data):
+        # data holds whole rows of width * 4 RGBA bytes, without filter bytes
+        data = memoryview(data)
+        rows = len(data) // self._stride
+        if rows * self._stride != len(data):
+            raise ValueError("Row data is not a whole number of rows")
+        if self.rows_written + rows > self.height:
+            raise ValueError(f"Too many rows for a {self.width}x{self.height} PNG")
+        filtered = bytearray(rows * (self._stride + 1))  # Filter type 0 (none) on every row
+        for row in range(rows):
+            start = row * (self._stride + 1) + 1
+            filtered[start:start + self._stride] = data[row * self._stride:(row + 1) * self._stride]
+        self._compress(filtered)
+        self.rows_written += rows
+
+    def write_blank_rows(self, count, rgba=(0, 0, 0, 0)):
+        row = b'\x00' + bytes(rgba) * self.width
+        for _ in range(count):
+            self._compress(row)
+        self.rows_written += count
+
+    def write_image(self, image):
+        # Appends every row of a QImage that is exactly width pixels wide
+        if image.width() != self.width:
+            raise ValueError(f"Image is {image.width()} pixels wide, expected {self.width}")
+        image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        line = image.bytesPerLine()
+        if line == self._stride:
+            self.write_rows(bits.asstring())
+        else:
+            data = bits.asstring()
+            self.write_rows(b''.join(data[row * line:row * line + self._stride] for row in range(image.height())))
+
+    def _compress(self, data):
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_bytes += len(compressed)
+            if self._pending_bytes >= IDAT_CHUNK_BYTES:
+                self._flush_idat()
+
+    def _flush_idat(self):
+        if self._pending:
+            self.file.write(_chunk(b'IDAT', b''.join(self._pending)))
+            self._pending = []
+            self._pending_bytes = 0
+
+    def close(self):
+        if self._compressor is None:
+            return
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(f"Wrote {self.rows_written} of {self.height} rows")
+        try:
+            self._pending.append(self._compressor.flush())
+            self._compressor = None
+            self._flush_idat()
+            self.file.write(_chunk(b'IEND', b''))
+            if self._owns_file:
+                self.file.close()
+                os.replace(self._temp_path, self.path)
+                self._temp_path = None
+        except BaseException:
+            self.abort()
+            raise
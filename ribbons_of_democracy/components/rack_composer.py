@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from dataclasses import replace
+from PyQt6.QtGui import QImage, QPainter, QColor
+from .batch_renderer import load_decoration
+from .png_stream import PngWriter
+from .ribbon_data import RibbonData
+from .ribbon_drawer import RibbonDrawer, resolve_size
+from .render_cache import default_render_cache
+
+DEFAULT_COLUMNS = 3
+DEFAULT_SPACING = 4
+DEFAULT_RACK_SIZE = 'thumbnail'
+
+
+# Lays ribbons out in a grid in precedence order, highest first, reading left
+# to right and top to bottom. When the last row would be short, the short row
+# goes at the top and is centred, as racks are worn. The PNG is written one
+# row of ribbons at a time, so memory depends on the rack width and on
+# max_cached, never on the number of rows. Each distinct ribbon is drawn once
+# and kept in a bounded LRU, so repeated ribbons only cost a blit.
+class RackComposer:
+    def __init__(self, entries, columns=DEFAULT_COLUMNS, size=DEFAULT_RACK_SIZE, spacing=DEFAULT_SPACING,
+                 frame=None, background='#00000000', backend='qpainter', max_cached=64):
+        # entries are RibbonData objects, decoration JSON paths or (library, name) pairs
+        self.entries = list(entries)
+        self.columns = max(1, columns)
+        self.ribbon_width, self.ribbon_height = resolve_size(size)
+        self.spacing = spacing
+        self.frame = frame
+        self.background = QColor(background)
+        self.backend = backend
+        self.max_cached = max_cached
+        self._images = OrderedDict()
+        self._keys = {}
+        self.renders = 0
+        self.reused = 0
+
+    @property
+    def rows(self):
+        return -(-len(self.entries) // self.columns)
+
+    @property
+    def width(self):
+        columns = min(self.columns, len(self.entries)) or 1
+        return columns * self.ribbon_width + (columns - 1) * self.spacing
+
+    @property
+    def height(self):
+        rows = self.rows or 1
+        return rows * self.ribbon_height + (rows - 1) * self.spacing
+
+    def row_entries(self, row):
+        # The first row holds the remainder when entries do not fill every row
+        short = len(self.entries) % self.columns
+        if short and row == 0:
+            return self.entries[:short]
+        start = short + (row - 1 if short else row) * self.columns
+        return self.entries[start:start + self.columns]
+
+    def _load(self, entry):
+        if isinstance(entry, RibbonData):
+            ribbon_data = entry
+        else:
+            ribbon_data = load_decoration(entry)
+        if self.frame:
+            framed = RibbonData()
+            framed.ribbon = replace(ribbon_data.ribbon, frame=self.frame)
+            ribbon_data = framed
+        return ribbon_data
+
+    def _entry_id(self, entry):
+        # Section versions are unique across all RibbonData, so they identify the content
+        if isinstance(entry, RibbonData):
+            return tuple(sorted(entry.versions.items()))
+        return entry
+
+    def ribbon_image(self, entry):
+        # Same decoration file, or same pixels under another name, reuse one render
+        entry_id = self._entry_id(entry)
+        key = self._keys.get(entry_id)
+        ribbon_data = None
+        if key is None:
+            ribbon_data = self._load(entry)
+            key = default_render_cache().key_for(ribbon_data, (self.ribbon_width, self.ribbon_height))
+            self._keys[entry_id] = key
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.reused += 1
+            return image
+        if ribbon_data is None:
+            ribbon_data = self._load(entry)
+        image = RibbonDrawer.render_image(ribbon_data, self.ribbon_width, self.ribbon_height, self.backend)
+        self.renders += 1
+        self._images[key] = image
+        while len(self._images) > self.max_cached:
+            self._images.popitem(last=False)
+        return image
+
+    def render_row(self, row):
+        entries = self.row_entries(row)
+        strip = QImage(self.width, self.ribbon_height, QImage.Format.Format_ARGB32_Premultiplied)
+        strip.fill(self.background)
+        used = len(entries) * self.ribbon_width + (len(entries) - 1) * self.spacing
+        x = (self.width - used) // 2
+        painter = QPainter(strip)
+        for entry in entries:
+            painter.drawImage(x, 0, self.ribbon_image(entry))
+            x += self.ribbon_width + self.spacing
+        painter.end()
+        return strip
+
+    def write_png(self, filename):
+        spacer = self.background.getRgb()
+        with PngWriter(filename, self.width, self.height) as writer:
+            if not self.entries:
+                writer.write_blank_rows(self.height, spacer)
+            for row in range(self.rows):
+                if row:
+                    writer.write_blank_rows(self.spacing, spacer)
+                writer.write_image(self.render_row(row))
+        return {'ribbons': len(self.entries), 'rendered': self.renders, 'reused': self.reused,
+                'width': self.width, 'height': self.height}
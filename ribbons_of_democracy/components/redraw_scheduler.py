@@ -0,0 +1,39 @@
+from PyQt6.QtCore import QObject, QTimer
+
+FRAME_INTERVAL_MS = 16  # One frame at 60 Hz
+
+# Merges every redraw request that arrives within one display frame into a
+# single render. flush() renders any pending request immediately, for callers
+# such as export that need the preview to be current right now.
+class RedrawScheduler(QObject):
+    def __init__(self, render, interval=FRAME_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self._render = render
+        self._pending = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        self.requested = 0
+        self.rendered = 0
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def request(self):
+        self.requested += 1
+        self._pending = True
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        self._timer.stop()
+        if self._pending:
+            self._pending = False
+            self.rendered += 1
+            self._render()
+
+    def cancel(self):
+        self._timer.stop()
+        self._pending = False
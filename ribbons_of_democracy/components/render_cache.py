@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from .asset_catalog import asset_catalog
+
+RENDERER_VERSION = 2  # Bump whenever a change to RibbonDrawer alters its output
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_DIR_ENV = 'RIBBONS_RENDER_CACHE'
+
+_default_cache = None
+
+
+def user_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'ribbons_of_democracy'
+
+
+def default_cache_dir():
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    return user_cache_dir() / 'renders'
+
+
+def default_render_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RenderCache(default_cache_dir())
+    return _default_cache
+
+
+def parse_size(text):
+    # Byte sizes for the CLI, such as 500000, 200K, 64M or 1G
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+# Persistent cache of rendered PNGs, addressed by a hash of everything that
+# affects the pixels: the ribbon's drawing data, the content of every asset
+# it references, the output size and the renderer version. Editing one
+# device PNG therefore only misses for the ribbons that use that device.
+class RenderCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._asset_hashes = {}
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def asset_hash(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._asset_hashes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        # Hashed outside the lock; two threads may both hash a new file, but agree
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._asset_hashes[path] = (stamp, digest.hexdigest())
+        return digest.hexdigest()
+
+    def key_for(self, ribbon_data, size, variant=''):
+        ribbon = ribbon_data.ribbon
+        data = ribbon.to_dict()
+        del data['info']  # Names and descriptions never reach the pixels
+        for device in data['devices']:
+            device.pop('name')
+            device['path'] = self.asset_hash(device['path'])
+        if data['logo']:
+            data['logo'] = self.asset_hash(data['logo'])
+        if data['frame']:
+            data['frame'] = self.asset_hash(asset_catalog.frame_path(data['frame']))
+        payload = json.dumps({'ribbon': data, 'size': list(size), 'variant': variant,
+                              'renderer': RENDERER_VERSION}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.directory / key[:2] / f"{key}.png"
+
+    def fetch(self, key, filename):
+        # Copies a cached render to filename, returning False on a miss
+        entry = self._entry_path(key)
+        try:
+            shutil.copyfile(entry, filename)
+            os.utime(entry)  # Entry modification time doubles as last use for eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def read(self, key):
+        entry = self._entry_path(key)
+        try:
+            data = entry.read_bytes()
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def store(self, key, filename):
+        with open(filename, 'rb') as file:
+            self.store_bytes(key, file.read())
+
+    def store_bytes(self, key, data):
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        temp = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp.write_bytes(data)
+        try:
+            replaced = entry.stat().st_size  # An existing entry for the key is overwritten, not added to
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(temp, entry)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self.stats()['bytes']
+            else:
+                self._total_bytes += len(data) - replaced
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self.prune(int(self.max_bytes * 0.9))
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        entries = []
+        for entry in self.directory.glob('*/*.png'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        return entries
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            'directory': str(self.directory),
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def prune(self, max_bytes=None):
+        # Evicts least recently used renders until the cache fits in max_bytes
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= max_bytes:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total_bytes = total
+        return removed
+
+    def clear(self):
+        return self.prune(0)
@@ -0,0 +1,98 @@
+import functools
+import threading
+import time
+from collections import deque
+
+SAMPLE_WINDOW = 512  # Recent samples kept per metric for percentiles and rates
+STAGES = ('background', 'stripes', 'texture', 'devices', 'logo', 'frame', 'outline')
+
+
+class Metric:
+    __slots__ = ('count', 'total', 'last', 'samples')
+
+    def __init__(self, window=SAMPLE_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+        self.samples = deque(maxlen=window)  # (finish time, seconds) pairs
+
+    def record(self, seconds, now):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.samples.append((now, seconds))
+
+    def percentile(self, percent):
+        values = sorted(seconds for _, seconds in self.samples)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+    def rate(self, now, interval=1.0):
+        # Events per second over the last interval seconds
+        return sum(1 for finished, _ in self.samples if now - finished <= interval) / interval
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'last': self.last,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+# Process-wide timings of the render stages and anything else worth watching.
+# Recording costs two clock reads and a deque append, so it stays on in
+# production; set enabled to False to skip even that.
+class RenderMetrics:
+    def __init__(self, window=SAMPLE_WINDOW):
+        self.window = window
+        self.enabled = True
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        now = time.perf_counter()
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(self.window)
+            metric.record(seconds, now)
+
+    def timed(self, name):
+        # Decorator that records how long each call of the function takes
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def get(self, name):
+        with self._lock:
+            metric = self._metrics.get(name)
+            return metric.summary() if metric else None
+
+    def rate(self, name, interval=1.0):
+        with self._lock:
+            metric = self._metrics.get(name)
+            return metric.rate(time.perf_counter(), interval) if metric else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {name: metric.summary() for name, metric in self._metrics.items()}
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+render_metrics = RenderMetrics()
@@ -0,0 +1,371 @@
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+from .asset_catalog import KIND_DIRS, asset_catalog
+from .batch_renderer import collect_decorations, decoration_name, init_worker, load_decoration
+from .render_cache import default_render_cache
+from .render_metrics import RenderMetrics
+from .ribbon_drawer import MAX_DIRECT_EXPORT_PIXELS, resolve_size
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def init_render_worker():
+    # Ctrl+C reaches the whole process group; the server shuts the workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_worker()
+
+
+def render_png(data, size, backend='qpainter'):
+    # Runs in a worker process; data is a ribbon dict with absolute asset paths
+    from .bulk_io import encode_png
+    from .ribbon_data import RibbonData
+    from .ribbon_drawer import RibbonDrawer
+
+    start = time.perf_counter()
+    ribbon_data = RibbonData()
+    ribbon_data.set_data(data)
+    png = encode_png(RibbonDrawer.render_image(ribbon_data, *size, backend))
+    return png, time.perf_counter() - start
+
+
+# Encoded PNG responses by ETag, least recently used first out once the
+# total size passes max_bytes
+class ResponseCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                self.bytes -= len(self._entries.popitem(last=False)[1])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else None}
+
+
+# Renders decorations on request. The ETag is the render cache key, a hash of
+# everything that reaches the pixels, so it is known before anything is drawn:
+# a matching If-None-Match is answered without rendering, a response already
+# in the LRU is served from memory, and concurrent requests for the same
+# render share one job on the worker pool.
+class RenderService:
+    def __init__(self, inputs, jobs=None, backend='qpainter', cache_bytes=DEFAULT_CACHE_BYTES):
+        self.inputs = list(inputs)
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.backend = backend
+        self.cache = ResponseCache(cache_bytes)
+        self.metrics = RenderMetrics()
+        self.started = time.time()
+        self.requests = 0
+        self.not_modified = 0
+        self.shared = 0  # Requests that joined a render already in flight
+        self.waiting = 0  # Requests blocked on a render
+        self._decorations = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        # POSTed ribbons resolve relative logo paths as if saved in the first folder
+        self.base_dir = next((str(path) for path in self.inputs if os.path.isdir(path)), os.getcwd())
+        self.rescan()
+
+    def start(self):
+        # Spawn rather than fork so no worker inherits Qt state from the parent
+        context = multiprocessing.get_context('spawn')
+        self._pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=context, initializer=init_render_worker)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def rescan(self):
+        decorations = {}
+        for decoration in collect_decorations(self.inputs):
+            decorations.setdefault(decoration_name(decoration).casefold(), decoration)
+        with self._lock:
+            self._decorations = decorations
+
+    def names(self):
+        with self._lock:
+            return sorted(decoration_name(decoration) for decoration in self._decorations.values())
+
+    def decoration(self, name):
+        # Looked up again after a rescan, so decorations added since startup are found
+        for attempt in range(2):
+            with self._lock:
+                decoration = self._decorations.get(name.casefold())
+            if decoration is not None:
+                return decoration
+            if attempt == 0:
+                self.rescan()
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No decoration named {name!r}")
+
+    def load(self, name):
+        try:
+            return load_decoration(self.decoration(name))
+        except (OSError, ValueError, KeyError) as e:
+            raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, f"Could not load {name!r}: {e}")
+
+    def parse(self, body):
+        from .ribbon_data import RibbonData
+
+        try:
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("Ribbon data must be a JSON object")
+            self.resolve_assets(data)
+            ribbon_data = RibbonData()
+            ribbon_data.load_from_dict(data, self.base_dir)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid ribbon JSON: {e}")
+        return ribbon_data
+
+    def resolve_assets(self, data):
+        # POSTed ribbons may only draw images from the asset folders, so a
+        # request cannot make the server read any other file. A path outside
+        # them is looked up in the catalog by file name, as for a decoration
+        # saved on another machine.
+        if isinstance(data.get('logo'), str) and data['logo']:
+            logo = os.path.join(self.base_dir, data['logo'].replace('\\', os.sep))
+            data['logo'] = self.asset_path('logos', logo)
+        devices = data.get('devices')
+        for device in devices if isinstance(devices, list) else ():
+            if isinstance(device, dict) and isinstance(device.get('path'), str):
+                device['path'] = self.asset_path('devices', device['path'], str(device.get('name', '')))
+
+    @staticmethod
+    def asset_path(kind, path, name=''):
+        real = os.path.normcase(os.path.realpath(path))
+        for root in asset_catalog.roots:
+            folder = os.path.normcase(os.path.realpath(root / KIND_DIRS[kind]))
+            if real.startswith(folder + os.sep) and os.path.isfile(real):
+                return path
+        stem = Path(path.replace('\\', '/')).stem
+        asset = asset_catalog.get(kind, stem) or (asset_catalog.get(kind, name) if name else None)
+        if asset is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{Path(path).name!r} is not in the {kind} asset folders")
+        return asset.path
+
+    def etag(self, ribbon_data, size):
+        return default_render_cache().key_for(ribbon_data, size, self.backend)
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def render(self, ribbon_data, size, etag):
+        # The encoded PNG for ribbon_data at size, from memory or the pool.
+        # The cache is checked under the lock, as _finished caches a render
+        # before dropping it from _in_flight, so one of the two always has it.
+        with self._lock:
+            body = self.cache.get(etag)
+            if body is not None:
+                return body
+            future = self._in_flight.get(etag)
+            submitted = future is None
+            if submitted:
+                future = self._pool.submit(render_png, ribbon_data.to_dict(), size, self.backend)
+                self._in_flight[etag] = future
+            else:
+                self.shared += 1
+            self.waiting += 1
+        if submitted:
+            # Outside the lock, as a future that is already done runs the callback at once
+            future.add_done_callback(lambda done: self._finished(etag, done))
+        try:
+            body, seconds = future.result()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        return body
+
+    def _finished(self, etag, future):
+        if not future.cancelled() and future.exception() is None:
+            body, seconds = future.result()
+            self.metrics.record('render', seconds)
+            self.cache.put(etag, body)
+        with self._lock:
+            self._in_flight.pop(etag, None)
+
+    def status(self):
+        with self._lock:
+            in_flight = len(self._in_flight)
+            decorations = len(self._decorations)
+            waiting = self.waiting
+        return {
+            'uptime': time.time() - self.started,
+            'workers': self.jobs,
+            'backend': self.backend,
+            'decorations': decorations,
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'shared_renders': self.shared,
+            'rendering': min(in_flight, self.jobs),
+            'queue_depth': max(0, in_flight - self.jobs),  # Renders waiting for a free worker
+            'waiting_requests': waiting,
+            'cache': self.cache.stats(),
+            'latency': self.metrics.get('request'),
+            'render_time': self.metrics.get('render'),
+            'requests_per_second': self.metrics.rate('request', 10.0),
+        }
+
+
+def parse_size_param(query):
+    spec = query.get('size', ['game'])[0]
+    try:
+        width, height = resolve_size(spec)
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid size {spec!r}")
+    if width * height > MAX_DIRECT_EXPORT_PIXELS:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Size {spec!r} is out of range")
+    return width, height
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'RibbonsOfDemocracy'
+    protocol_version = 'HTTP/1.1'
+    body_pending = False  # The request has a body nothing has read yet
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def end_headers(self):
+        # A body left unread would be parsed as the next request on a kept-alive
+        # connection, so any response sent without reading it closes the connection
+        if self.body_pending:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        super().end_headers()
+
+    def read_body(self):
+        text = self.headers.get('Content-Length')
+        if text is None:
+            raise RequestError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+        text = text.strip()
+        if not (text.isascii() and text.isdigit()):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length {text!r}")
+        length = int(text)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Ribbon JSON is too large")
+        body = self.rfile.read(length)
+        self.body_pending = False
+        return body
+
+    def handle_request(self, method):
+        start = time.perf_counter()
+        self.body_pending = self.headers.get('Content-Length', '0').strip() != '0' or 'Transfer-Encoding' in self.headers
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        try:
+            if method == 'GET' and url.path == '/status':
+                self.send_json(self.service.status())
+                return
+            if method == 'GET' and url.path == '/ribbons':
+                self.send_json({'ribbons': self.service.names()})
+                return
+            if method == 'GET' and url.path.startswith('/ribbons/') and url.path.endswith('.png'):
+                ribbon_data = self.service.load(unquote(url.path[len('/ribbons/'):-len('.png')]))
+            elif method == 'POST' and url.path == '/render':
+                ribbon_data = self.service.parse(self.read_body())
+            else:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"No such endpoint: {method} {url.path}")
+            self.service.count('requests')
+            self.send_png(ribbon_data, parse_size_param(query))
+        except RequestError as e:
+            self.send_error_json(e.status, str(e))
+        except Exception as e:
+            self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+        finally:
+            if url.path != '/status':
+                self.service.metrics.record('request', time.perf_counter() - start)
+
+    def send_png(self, ribbon_data, size):
+        etag = f'"{self.service.etag(ribbon_data, size)}"'
+        tags = [tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')]
+        if etag in tags or '*' in tags:
+            self.service.count('not_modified')
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = self.service.render(ribbon_data, size, etag.strip('"'))
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')  # Stored, but revalidated with If-None-Match
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=HTTPStatus.OK):
+        body = json.dumps(data, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json({'error': message}, status)
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, verbose=False):
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
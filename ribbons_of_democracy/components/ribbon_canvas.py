@@ -0,0 +1,61 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QPainter, QPen, QColor
+from PyQt6.QtCore import Qt, QRect, pyqtSignal
+
+SELECTION_MARGIN = 2  # Room for the selection outline outside the item itself
+
+
+# Shows the rendered ribbon image and reports mouse activity in ribbon
+# coordinates. Repaints are limited to the rectangles that changed, so moving
+# one device only repaints where it was and where it is now.
+class RibbonCanvas(QWidget):
+    pressed = pyqtSignal(int, int)
+    moved = pyqtSignal(int, int)
+    released = pyqtSignal(int, int)
+
+    def __init__(self, width, height, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(width, height)
+        self.setMouseTracking(True)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self._image = None
+        self._selection = None
+
+    def set_image(self, image, dirty=None):
+        # dirty is the (x, y, width, height) area that changed, or None for all of it
+        self._image = image
+        self.update(QRect(*dirty) if dirty else self.rect())
+
+    def set_selection(self, rect):
+        if rect == self._selection:
+            return
+        for area in (self._selection, rect):
+            if area:
+                x, y, width, height = area
+                self.update(QRect(x, y, width, height).adjusted(-SELECTION_MARGIN - 1, -SELECTION_MARGIN - 1,
+                                                                SELECTION_MARGIN + 1, SELECTION_MARGIN + 1))
+        self._selection = rect
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+        painter.fillRect(area, self.palette().window())
+        if self._image is not None:
+            painter.drawImage(area, self._image, area)
+        if self._selection:
+            x, y, width, height = self._selection
+            painter.setPen(QPen(QColor('#ffd24a'), 1, Qt.PenStyle.DashLine))
+            painter.drawRect(QRect(x, y, width, height).adjusted(-SELECTION_MARGIN, -SELECTION_MARGIN,
+                                                                 SELECTION_MARGIN - 1, SELECTION_MARGIN - 1))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.pressed.emit(int(event.position().x()), int(event.position().y()))
+
+    def mouseMoveEvent(self, event):
+        self.moved.emit(int(event.position().x()), int(event.position().y()))
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.released.emit(int(event.position().x()), int(event.position().y()))
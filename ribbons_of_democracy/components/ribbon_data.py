@@ -1,110 +1,252 @@
+import itertools
 import json
 import os
-from pathlib import Path
+from collections import deque
+from dataclasses import replace
+from itertools import zip_longest
+from .history import History, DEFAULT_HISTORY_BUDGET, ListInsert, ListRemove, ListReplace, SetValue, ReplaceRibbon
+from .ribbon_model import Ribbon, Stripe, Device, RIBBON_WIDTH, RIBBON_HEIGHT
+from .asset_catalog import asset_catalog
+from .stripe_runs import StripeRuns
+from .device_layout import layout_devices, layout_bounds, logo_rect
+
+SECTIONS = ('background', 'stripes', 'devices', 'texture', 'frame', 'logo', 'info')
+DAMAGE_LOG = 256  # Recent damaged areas kept for renderers to catch up from
+
+# Shared across instances so a fresh RibbonData never reuses a version number
+# that a renderer may still have cached for another ribbon
+_version_counter = itertools.count(1)
 
 class RibbonData:
-    def __init__(self):
-        self.data = {
-            'background': '#000000',
-            'stripes': [],
-            'devices': [],
-            'texture_enabled': False,
-            'frame': None,  # Can be 'gold', 'silver', or None
-            'logo': None,  # Will store the path to the logo image
-            'info': {
-                'name': '',
-                'award_details': '',
-                'device_details': ''
-            }
-        }
+    def __init__(self, history_budget=DEFAULT_HISTORY_BUDGET):
+        self.ribbon = Ribbon()
+        self.versions = {}
+        self.lineage = object()  # Shared with snapshots, whose versions and damage carry on from this
+        self._stripe_runs = StripeRuns(RIBBON_WIDTH)
+        self._device_slots = ()  # (device, rect) as last laid out
+        self._logo_slot = (None, None)  # (logo path, rect) as last laid out
+        self._damage = deque()
+        self._damage_floor = {}
+        self.touch_all()
+        self.history = History(history_budget)
+
+    # The ribbon in the JSON layout. The dict is a copy, so changing it does
+    # not change the ribbon; pass it to set_data to replace the whole ribbon.
+    def to_dict(self):
+        return self.ribbon.to_dict()
+
+    # Read-only, for code written against the old data attribute
+    @property
+    def data(self):
+        return self.to_dict()
+
+    def set_data(self, value):
+        self.ribbon = Ribbon.from_dict(value)
+        self.touch_all()
+        self.history.clear()
+
+    def touch(self, *sections):
+        for section in sections:
+            version = self.versions[section] = next(_version_counter)
+            rects = self._damaged(section)
+            if rects is None or rects:
+                self._log_damage(version, section, None if rects is None else layout_bounds(rects))
+
+    def _damaged(self, section):
+        # Areas of the base ribbon that a change to section may have altered,
+        # or None when it may have altered all of it
+        if section == 'stripes':
+            return [(start, 0, end - start, RIBBON_HEIGHT) for start, end in self._stripe_runs.update(self.ribbon.stripes)]
+        # A slot whose device or logo image changed is damaged even where its
+        # rect did not move, as when swapping in another image of the same size
+        if section == 'devices':
+            before = self._device_slots
+            devices = self.ribbon.devices
+            self._device_slots = tuple(zip(devices, layout_devices(devices, RIBBON_WIDTH, RIBBON_HEIGHT)))
+            return [slot[1] for old, new in zip_longest(before, self._device_slots) if old != new
+                    for slot in (old, new) if slot]
+        if section == 'logo':
+            before, self._logo_slot = self._logo_slot, (self.ribbon.logo, logo_rect(self.ribbon))
+            return [rect for _, rect in (before, self._logo_slot) if rect] if before != self._logo_slot else []
+        if section == 'info':
+            return []
+        return None
+
+    def _log_damage(self, version, section, rect):
+        if len(self._damage) == DAMAGE_LOG:
+            dropped_version, dropped_section, _ = self._damage.popleft()
+            self._damage_floor[dropped_section] = dropped_version
+        self._damage.append((version, section, rect))
+
+    def damage_since(self, versions):
+        # versions maps sections to the versions a renderer last drew. Returns
+        # the (x, y, width, height) areas changed since then, or None when the
+        # changes are not all known and everything has to be redrawn.
+        if any(self._damage_floor.get(section, 0) > seen for section, seen in versions.items()):
+            return None
+        oldest = min(versions.values())
+        rects = []
+        for version, section, rect in reversed(self._damage):
+            if version <= oldest:
+                break
+            if section in versions and version > versions[section]:
+                if rect is None:
+                    return None
+                rects.append(rect)
+        return rects
+
+    def touch_all(self):
+        self.touch(*SECTIONS)
+
+    def snapshot(self):
+        # A copy to render from on another thread while editing carries on here
+        snapshot = RibbonData.__new__(RibbonData)
+        snapshot.ribbon = self.ribbon.copy()
+        snapshot.versions = dict(self.versions)
+        snapshot.lineage = self.lineage
+        snapshot._stripe_runs = self.stripe_runs().copy()
+        snapshot._device_slots = self._device_slots
+        snapshot._logo_slot = self._logo_slot
+        snapshot._damage = deque(self._damage)
+        snapshot._damage_floor = dict(self._damage_floor)
+        snapshot.history = None
+        return snapshot
+
+    def stripe_runs(self):
+        # Visible stripe runs, brought up to date with whatever changed since the last call
+        self._stripe_runs.update(self.ribbon.stripes)
+        return self._stripe_runs
+
+    def _do(self, operation, merge=False):
+        operation.apply(self)
+        self.history.record(operation, merge)
+
+    def undo(self):
+        return self.history.undo(self)
+
+    def redo(self):
+        return self.history.redo(self)
 
     def add_stripe(self, x, width, color, mirrored=False):
-        self.data['stripes'].append({'x': x, 'width': width, 'color': color, 'mirrored': mirrored})
+        stripes = self.ribbon.stripes
+        self._do(ListInsert('stripes', len(stripes), Stripe(x, width, color, mirrored)))
 
-    def add_device(self, name, path, x, y, width, height):
-        self.data['devices'].append({'name': name, 'path': path, 'x': x, 'y': y, 'width': width, 'height': height})
+    def add_device(self, name, path, x, y, width, height, offset_x=0, offset_y=0):
+        devices = self.ribbon.devices
+        device = Device(name, path, x, y, width, height, offset_x=offset_x, offset_y=offset_y)
+        self._do(ListInsert('devices', len(devices), device))
 
     def set_background(self, color):
-        self.data['background'] = color
+        self._do(SetValue('background', self.ribbon.background, color))
 
     def remove_stripe(self, index):
-        del self.data['stripes'][index]
+        self._do(ListRemove('stripes', index, self.ribbon.stripes[index]))
 
     def remove_device(self, index):
-        del self.data['devices'][index]
+        self._do(ListRemove('devices', index, self.ribbon.devices[index]))
 
-    def edit_stripe(self, index, x, width, color, mirrored):
-        if 0 <= index < len(self.data['stripes']):
-            self.data['stripes'][index] = {'x': x, 'width': width, 'color': color, 'mirrored': mirrored}
+    def edit_stripe(self, index, x, width, color, mirrored, merge=False):
+        stripes = self.ribbon.stripes
+        if 0 <= index < len(stripes):
+            stripe = Stripe(x, width, color, mirrored)
+            if stripes[index] != stripe:
+                self._do(ListReplace('stripes', index, stripes[index], stripe), merge)
+
+    def toggle_mirror(self, index):
+        stripe = self.ribbon.stripes[index]
+        self._do(ListReplace('stripes', index, stripe, replace(stripe, mirrored=not stripe.mirrored)))
 
     def edit_device(self, index, name, color_or_path, x, y, width=None, height=None):
-        device = self.data['devices'][index]
-        device['name'] = name
-        device['x'] = x
-        device['y'] = y
+        before = self.ribbon.devices[index]
         if width is not None and height is not None:
-            device['path'] = color_or_path
-            device['width'] = width
-            device['height'] = height
+            device = replace(before, name=name, x=x, y=y, path=color_or_path, width=width, height=height)
         else:
-            device['color'] = color_or_path
+            device = replace(before, name=name, x=x, y=y, color=color_or_path)
+        self._do(ListReplace('devices', index, before, device))
+
+    def move_device(self, index, offset_x, offset_y, merge=False):
+        before = self.ribbon.devices[index]
+        if (before.offset_x, before.offset_y) != (offset_x, offset_y):
+            self._do(ListReplace('devices', index, before, replace(before, offset_x=offset_x, offset_y=offset_y)), merge)
+
+    def move_logo(self, offset_x, offset_y, merge=False):
+        if self.ribbon.logo_offset != (offset_x, offset_y):
+            self._do(SetValue('logo_offset', self.ribbon.logo_offset, (offset_x, offset_y), 'logo'), merge)
+
+    def set_texture_enabled(self, enabled):
+        self._do(SetValue('texture_enabled', self.ribbon.texture_enabled, enabled, section='texture'))
 
     def load_from_file(self, filename):
         with open(filename, 'r') as file:
             data = json.load(file)
+        self.load_from_dict(data, os.path.dirname(filename))
+
+    def load_from_library(self, library, name):
+        from .ribbon_library import RibbonLibrary
+
+        if not isinstance(library, RibbonLibrary):
+            with RibbonLibrary(library) as opened:
+                return self.load_from_library(opened, name)
+        self.load_from_dict(library.get(name), os.path.dirname(os.path.abspath(library.path)))
+
+    def load_from_dict(self, data, base_dir):
+        if not isinstance(data, dict):
+            raise ValueError("Ribbon data must be a JSON object")
+        # Logo paths are stored relative to the file the decoration lives in
         if data.get('logo'):
-            logo_path = os.path.join(os.path.dirname(filename), data['logo'])
+            # Decorations exported on Windows store the logo with backslashes
+            logo_path = os.path.join(base_dir, data['logo'].replace('\\', os.sep))
             if os.path.exists(logo_path):
                 data['logo'] = logo_path
             else:
                 print(f"Warning: Logo file not found at {logo_path}")
                 data['logo'] = None
-        self.data = data
+        for device in data.get('devices', []):
+            if isinstance(device, dict) and isinstance(device.get('path'), str):
+                device['path'] = asset_catalog.resolve_device(device['path'], device.get('name', ''))
+        self.set_data(data)
+
+    def to_json_dict(self, base_dir):
+        data = self.ribbon.to_dict()
+        if data.get('logo'):
+            data['logo'] = os.path.relpath(data['logo'], base_dir or os.curdir)
+        return data
 
     def save_to_file(self, filename):
-        data_to_save = self.data.copy()
-        if data_to_save.get('logo'):
-            data_to_save['logo'] = os.path.relpath(data_to_save['logo'], os.path.dirname(filename))
+        data_to_save = self.to_json_dict(os.path.dirname(filename))
         with open(filename, 'w') as file:
             json.dump(data_to_save, file)
 
     def set_frame(self, frame_type):
         if frame_type in ['gold', 'silver', None]:
-            self.data['frame'] = frame_type
             if frame_type:
-                frame_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frames', f"{frame_type.capitalize()}-Frame.png")
-                if not os.path.exists(frame_path):
-                    print(f"Warning: Frame file not found at {frame_path}")
-                    self.data['frame'] = None
+                path = asset_catalog.frame_path(frame_type)
+                if not os.path.exists(path):
+                    print(f"Warning: Frame file not found at {path}")
+                    frame_type = None
+            self._do(SetValue('frame', self.ribbon.frame, frame_type))
 
     def remove_frame(self):
-        self.data['frame'] = None
+        self._do(SetValue('frame', self.ribbon.frame, None))
 
     def clear(self):
-        return self.__init__
+        self._do(ReplaceRibbon(self.ribbon, Ribbon()))
 
     def load_available_devices(self):
-        devices_dir = Path(__file__).parent.parent / 'standard_devices'
-        available_devices = []
-        for file in devices_dir.glob('*.png'):
-            available_devices.append({
-                'name': file.stem,
-                'path': str(file)
-            })
-        return available_devices
+        return [device.to_dict() for device in asset_catalog.devices()]
 
     def set_logo(self, logo_path):
-        self.data['logo'] = logo_path
+        self._do(SetValue('logo', self.ribbon.logo, logo_path))
 
     def remove_logo(self):
-        self.data['logo'] = None
+        self._do(SetValue('logo', self.ribbon.logo, None))
 
     def set_ribbon_info(self, name, award_details, device_details):
-        self.data['info'] = {
+        self._do(SetValue('info', self.ribbon.info, {
             'name': name,
             'award_details': award_details,
             'device_details': device_details
-        }
+        }))
 
     def get_ribbon_info(self):
-        return self.data['info']
\ No newline at end of file
+        return self.ribbon.info
@@ -1,23 +1,57 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QFileDialog, QColorDialog, QInputDialog, QMessageBox, QMenuBar, QSlider, QHBoxLayout, QPushButton, QComboBox
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QFileDialog, QColorDialog, QInputDialog, QMessageBox, QMenuBar, QSlider, QHBoxLayout, QPushButton, QComboBox, QProgressDialog
 from PyQt6.QtGui import QKeySequence, QShortcut, QColor, QPixmap, QPainter, QIcon, QAction
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer
+from functools import partial
 from .ribbon_data import RibbonData
 from .ribbon_drawer import RibbonDrawer
-from .ui_components import get_stripe_input, get_device_input, select_item
-from .device_selector import DeviceSelector
-import copy
+from .ribbon_canvas import RibbonCanvas
+from .device_layout import layout_devices, logo_rect
+from .ribbon_model import Device
+from .spatial_index import GridIndex
+from .background_renderer import BackgroundRenderer
+from .redraw_scheduler import RedrawScheduler
+from .render_metrics import render_metrics, STAGES
+from .ui_components import get_stripe_input, select_item
+from .asset_catalog import asset_catalog
 import os
 
 RIBBON_WIDTH = 1024
 RIBBON_HEIGHT = 282
 
+# Menu titles and their (label, handler name) entries. Entries are only
+# created the first time a menu opens, so none of this is built at startup.
+MENUS = (
+    ("File", (("Import", 'import_ribbon'), ("Export", 'export_ribbon'), ("Save as PNG", 'save_as_png'),
+              ("Save as High-Res PNG", 'save_high_res_png'), ("Import Folder", 'import_folder'),
+              ("Open Imported", 'open_imported'), ("Export Folder", 'export_folder'))),
+    ("Edit", (("Add Stripe", 'add_stripe'), ("Edit Stripe", 'edit_stripe'), ("Remove Stripe", 'remove_stripe'))),
+    ("Devices", (("Add Device", 'add_device'), ("Edit Device", 'edit_device'), ("Remove Device", 'remove_device'))),
+    ("Frame", (("Add Gold Frame", 'add_gold_frame'), ("Add Silver Frame", 'add_silver_frame'),
+               ("Remove Frame", 'remove_frame'))),
+    ("Misc", (("Change Background", 'change_background'), ("Clear All", 'clear_all'), ("Undo", 'undo_last_action'),
+              ("Redo", 'redo_last_action'), ("Toggle Mirror", 'toggle_mirror_stripe'),
+              ("Toggle Texture", 'toggle_texture'), ("Toggle Timing Overlay", 'toggle_timing_hud'))),
+    ("Logo", (("Add Super Earth Logo", 'add_logo'), ("Remove Logo", 'remove_logo'))),
+    ("Info", (("Edit Info", 'edit_ribbon_info'), ("View Info", 'view_ribbon_info'))),
+    ("Help", (("About", 'show_about'),)),
+)
+
 class RibbonDesigner(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Ribbons of Democracy")
         self.set_window_icon()
         self.ribbon_data = RibbonData()
+        self.frames = BackgroundRenderer(draw_outline=True, parent=self)
+        self.frames.frame_ready.connect(self.show_frame)
+        self.redraw = RedrawScheduler(self.draw_ribbon, parent=self)
         self.current_stripe_color = QColor("#FFFFFF")
+        self.selected_item = None  # ('device', index) or ('logo',) picked on the canvas
+        self.drag = None
+        self._hit_index = (None, None)
+        self.collection = []  # (name, RibbonData) pairs from the last folder import
+        self.current_name = None  # Which of them is open, if any
+        self.bulk_task = None
         self.init_ui()
 
     def set_window_icon(self):
@@ -57,12 +91,21 @@ class RibbonDesigner(QMainWindow):
 
         self.create_menu_bar()
 
-        self.ribbon_label = QLabel()
-        self.ribbon_label.setFixedSize(RIBBON_WIDTH, RIBBON_HEIGHT)
-        self.ribbon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        main_layout.addWidget(self.ribbon_label)
+        self.canvas = RibbonCanvas(RIBBON_WIDTH, RIBBON_HEIGHT)
+        self.canvas.pressed.connect(self.on_canvas_pressed)
+        self.canvas.moved.connect(self.on_canvas_moved)
+        self.canvas.released.connect(self.on_canvas_released)
+        main_layout.addWidget(self.canvas)
+
+        # Render timings drawn over the ribbon, off until toggled from the Misc menu
+        self.timing_hud = QLabel(self.canvas)
+        self.timing_hud.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #9cff9c; "
+                                      "font-family: monospace; padding: 4px;")
+        self.timing_hud.move(6, 6)
+        self.timing_hud.hide()
 
         self.create_stripe_controls(main_layout)
+        self.setup_shortcuts()
 
         # Adjust window size to fit the ribbon, menu bar, and stripe controls
         menu_bar_height = self.menuBar().sizeHint().height()
@@ -70,7 +113,14 @@ class RibbonDesigner(QMainWindow):
         window_height = RIBBON_HEIGHT + menu_bar_height + 100  # Add extra height for stripe controls
         self.setGeometry(100, 100, window_width, window_height)
 
-        self.draw_ribbon()
+        # Drawn in showEvent, so constructing the window never waits on a render
+        self.redraw.request()
+
+    def showEvent(self, event):
+        # The first frame is submitted as soon as the event loop runs, not a
+        # redraw interval later, and arrives through frame_ready like any other
+        super().showEvent(event)
+        QTimer.singleShot(0, self.redraw.flush)
 
     def create_stripe_controls(self, main_layout):
         stripe_layout = QHBoxLayout()
@@ -85,6 +135,7 @@ class RibbonDesigner(QMainWindow):
         self.x_slider = QSlider(Qt.Orientation.Horizontal)
         self.x_slider.setRange(0, RIBBON_WIDTH)
         self.x_slider.valueChanged.connect(self.on_stripe_changed)
+        self.x_slider.sliderReleased.connect(self.end_stripe_drag)
         position_layout.addWidget(position_label)
         position_layout.addWidget(self.x_slider)
         stripe_layout.addLayout(position_layout)
@@ -94,6 +145,7 @@ class RibbonDesigner(QMainWindow):
         self.width_slider = QSlider(Qt.Orientation.Horizontal)
         self.width_slider.setRange(1, RIBBON_WIDTH)
         self.width_slider.valueChanged.connect(self.on_stripe_changed)
+        self.width_slider.sliderReleased.connect(self.end_stripe_drag)
         width_layout.addWidget(width_label)
         width_layout.addWidget(self.width_slider)
         stripe_layout.addLayout(width_layout)
@@ -106,44 +158,14 @@ class RibbonDesigner(QMainWindow):
 
     def create_menu_bar(self):
         menu_bar = self.menuBar()
+        for title, entries in MENUS:
+            menu = menu_bar.addMenu(title)
+            menu.aboutToShow.connect(partial(self.populate_menu, menu, entries))
 
-        file_menu = menu_bar.addMenu("File")
-        file_menu.addAction("Import", self.import_ribbon)
-        file_menu.addAction("Export", self.export_ribbon)
-        file_menu.addAction("Save as PNG", self.save_as_png)
-
-        edit_menu = menu_bar.addMenu("Edit")
-        edit_menu.addAction("Add Stripe", self.add_stripe)
-        edit_menu.addAction("Edit Stripe", self.edit_stripe)
-        edit_menu.addAction("Remove Stripe", self.remove_stripe)
-
-        devices_menu = menu_bar.addMenu("Devices")
-        devices_menu.addAction("Add Device", self.add_device)
-        devices_menu.addAction("Edit Device", self.edit_device)
-        devices_menu.addAction("Remove Device", self.remove_device)
-
-        frame_menu = menu_bar.addMenu("Frame")
-        frame_menu.addAction("Add Gold Frame", self.add_gold_frame)
-        frame_menu.addAction("Add Silver Frame", self.add_silver_frame)
-        frame_menu.addAction("Remove Frame", self.remove_frame)
-
-        misc_menu = menu_bar.addMenu("Misc")
-        misc_menu.addAction("Change Background", self.change_background)
-        misc_menu.addAction("Clear All", self.clear_all)
-        misc_menu.addAction("Undo", self.undo_last_action)
-        misc_menu.addAction("Toggle Mirror", self.toggle_mirror_stripe)
-        misc_menu.addAction("Toggle Texture", self.toggle_texture)
-
-        logo_menu = menu_bar.addMenu("Logo")
-        logo_menu.addAction("Add Super Earth Logo", self.add_logo)
-        logo_menu.addAction("Remove Logo", self.remove_logo)
-
-        info_menu = menu_bar.addMenu("Info")
-        info_menu.addAction("Edit Info", self.edit_ribbon_info)
-        info_menu.addAction("View Info", self.view_ribbon_info)
-
-        help_menu = menu_bar.addMenu("Help")
-        help_menu.addAction("About", self.show_about)
+    def populate_menu(self, menu, entries):
+        if menu.isEmpty():
+            for label, handler in entries:
+                menu.addAction(label, getattr(self, handler))
 
     def get_icon_path(self, icon_name):
         icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'icons', f'{icon_name}.png')
@@ -151,23 +173,59 @@ class RibbonDesigner(QMainWindow):
 
     def setup_shortcuts(self):
         QShortcut(QKeySequence("Ctrl+Z"), self, self.undo_last_action)
+        QShortcut(QKeySequence("Ctrl+Y"), self, self.redo_last_action)
+        QShortcut(QKeySequence("Ctrl+Shift+Z"), self, self.redo_last_action)
         QShortcut(QKeySequence("Ctrl+N"), self, self.clear_all)
         QShortcut(QKeySequence("Ctrl+S"), self, self.export_ribbon)
         QShortcut(QKeySequence("Ctrl+O"), self, self.import_ribbon)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.toggle_timing_hud)
 
     def draw_ribbon(self):
-        pixmap = RibbonDrawer.draw_ribbon(self.ribbon_data, draw_outline=True)
-        self.ribbon_label.setPixmap(pixmap)
+        # Rendered on a worker thread; show_frame puts it on screen
+        self.frames.submit(self.ribbon_data)
+
+    def show_frame(self, generation, image, dirty):
+        # Only the area the edits since the last frame touched is repainted
+        self.canvas.set_image(image, dirty)
+        self.canvas.set_selection(self.item_rect(self.selected_item))
+        if self.timing_hud.isVisible():
+            self.update_timing_hud()
+
+    def toggle_timing_hud(self):
+        self.timing_hud.setVisible(not self.timing_hud.isVisible())
+        if self.timing_hud.isVisible():
+            self.update_timing_hud()
+
+    def update_timing_hud(self):
+        render = render_metrics.get('render')
+        if render is None:
+            lines = ["No renders yet"]
+        else:
+            lines = [f"{'render':<10} {render['last'] * 1000:6.2f}ms  p90 {render['p90'] * 1000:6.2f}ms  "
+                     f"{render_metrics.rate('render'):3.0f} redraws/s"]
+        # Only stages that ran for this frame's rebuilt layers have fresh values
+        for stage in STAGES:
+            metric = render_metrics.get(stage)
+            if metric is not None:
+                lines.append(f"{stage:<10} {metric['last'] * 1000:6.2f}ms  p90 {metric['p90'] * 1000:6.2f}ms")
+        self.timing_hud.setText("\n".join(lines))
+        self.timing_hud.adjustSize()
 
     def clear_all(self):
-        self.ribbon_data = RibbonData()
-        self.draw_ribbon()
+        self.ribbon_data.clear()
+        self.update_stripe_selector()
+        self.redraw.request()
 
     def undo_last_action(self):
-        if len(self.history) > 1:
-            self.history.pop()  # Remove the current state
-            self.ribbon_data.data = copy.deepcopy(self.history[-1])
-            self.draw_ribbon()
+        if self.ribbon_data.undo():
+            self.update_stripe_selector()
+            self.redraw.request()
+
+    def redo_last_action(self):
+        if self.ribbon_data.redo():
+            self.update_stripe_selector()
+            self.redraw.request()
+
     def add_stripe(self):
         self.stripe_selector.setCurrentIndex(0)
         self.x_slider.setValue(0)
@@ -176,128 +234,304 @@ class RibbonDesigner(QMainWindow):
         self.update_color_button()
 
     def edit_stripe(self):
-        if self.ribbon_data.data['stripes']:
+        if self.ribbon_data.ribbon.stripes:
             self.stripe_selector.setCurrentIndex(1)
         else:
             QMessageBox.information(self, "No Stripes", "There are no stripes to edit.")
 
     def add_device(self):
+        from .device_selector import DeviceSelector
+
         device_selector = DeviceSelector(self, self.ribbon_data.load_available_devices())
         if device_selector.exec():
             selected_device = device_selector.selected_device
-            device_pixmap = QPixmap(selected_device['path'])
-            aspect_ratio = device_pixmap.width() / device_pixmap.height()
-            max_height = RIBBON_HEIGHT // 3  # One-third of the ribbon height
-            height = min(int(RIBBON_HEIGHT * 0.3), max_height)
-            width = int(height * aspect_ratio)
-            x = (RIBBON_WIDTH - width) // 2  # Center horizontally
-            y = (RIBBON_HEIGHT - height) // 2  # Center vertically
+            x, y, width, height = self.device_geometry(selected_device)
             self.ribbon_data.add_device(selected_device['name'], selected_device['path'], 
                                         x, y, width, height)
-            self.draw_ribbon()
+            self.redraw.request()
+
+    def device_geometry(self, selected_device):
+        aspect_ratio = selected_device['width'] / selected_device['height']
+        max_height = RIBBON_HEIGHT // 3  # One-third of the ribbon height
+        height = min(int(RIBBON_HEIGHT * 0.3), max_height)
+        width = int(height * aspect_ratio)
+        x = (RIBBON_WIDTH - width) // 2  # Center horizontally
+        y = (RIBBON_HEIGHT - height) // 2  # Center vertically
+        return x, y, width, height
 
     def edit_device(self):
         index = select_item(self, "Edit Device", "Select device to edit:", 
-                            [f"{d['name']}" for d in self.ribbon_data.data['devices']])
+                            [d.name for d in self.ribbon_data.ribbon.devices])
         if index is not None:
+            from .device_selector import DeviceSelector
+
             device_selector = DeviceSelector(self, self.ribbon_data.load_available_devices())
             if device_selector.exec():
                 selected_device = device_selector.selected_device
-                device_pixmap = QPixmap(selected_device['path'])
-                aspect_ratio = device_pixmap.width() / device_pixmap.height()
-                max_height = RIBBON_HEIGHT // 3  # One-third of the ribbon height
-                height = min(int(RIBBON_HEIGHT * 0.3), max_height)
-                width = int(height * aspect_ratio)
-                x = (RIBBON_WIDTH - width) // 2  # Center horizontally
-                y = (RIBBON_HEIGHT - height) // 2  # Center vertically
+                x, y, width, height = self.device_geometry(selected_device)
                 self.ribbon_data.edit_device(index, selected_device['name'], selected_device['path'], 
                                              x, y, width, height)
-                self.draw_ribbon()
+                self.redraw.request()
 
     def remove_stripe(self):
-        index = select_item(self, "Remove Stripe", "Select stripe to remove:", [f"Stripe at x={s['x']}, width={s['width']}" for s in self.ribbon_data.data['stripes']])
+        index = select_item(self, "Remove Stripe", "Select stripe to remove:", [f"Stripe at x={s.x}, width={s.width}" for s in self.ribbon_data.ribbon.stripes])
         if index is not None:
             self.ribbon_data.remove_stripe(index)
-            self.draw_ribbon()
+            self.redraw.request()
 
     def remove_device(self):
-        index = select_item(self, "Remove Device", "Select device to remove:", [f"{d['name']} at ({d['x']}, {d['y']})" for d in self.ribbon_data.data['devices']])
+        index = select_item(self, "Remove Device", "Select device to remove:", [f"{d.name} at ({d.x}, {d.y})" for d in self.ribbon_data.ribbon.devices])
         if index is not None:
             self.ribbon_data.remove_device(index)
-            self.draw_ribbon()
+            self.redraw.request()
 
     def change_background(self):
-        color = QColorDialog.getColor(QColor(self.ribbon_data.data['background']))
+        color = QColorDialog.getColor(QColor(self.ribbon_data.ribbon.background))
         if color.isValid():
             self.ribbon_data.set_background(color.name())
-            self.draw_ribbon()
+            self.redraw.request()
 
     def import_ribbon(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Import Ribbon", "", "JSON Files (*.json)")
         if filename:
-            self.ribbon_data.load_from_file(filename)
-            self.draw_ribbon()
+            try:
+                self.ribbon_data.load_from_file(filename)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Import Failed", f"Could not import {os.path.basename(filename)}: {e}")
+                return
+            self.redraw.request()
 
     def export_ribbon(self):
         filename, _ = QFileDialog.getSaveFileName(self, "Export Ribbon", "", "JSON Files (*.json)")
         if filename:
             self.ribbon_data.save_to_file(filename)
 
+    def import_folder(self):
+        from . import bulk_io
+
+        folder = QFileDialog.getExistingDirectory(self, "Import Folder")
+        if folder:
+            self.start_bulk_task("Importing", bulk_io.import_folder, folder)
+
+    def open_imported(self):
+        index = select_item(self, "Imported Ribbons", "Select ribbon to open:", [name for name, _ in self.collection])
+        if index is not None:
+            self.store_current()
+            self.current_name, ribbon_data = self.collection[index]
+            self.ribbon_data.set_data(ribbon_data.to_dict())
+            self.update_stripe_selector()
+            self.redraw.request()
+
+    def store_current(self):
+        # Keeps the edits to the open imported ribbon when switching to another
+        for i, (name, _) in enumerate(self.collection):
+            if name == self.current_name:
+                self.collection[i] = (name, self.ribbon_data.snapshot())
+                break
+
+    def export_folder(self):
+        from . import bulk_io
+
+        folder = QFileDialog.getExistingDirectory(self, "Export Folder")
+        if folder:
+            self.start_bulk_task("Exporting", bulk_io.export_ribbons, self.ribbons_to_export(), folder)
+
+    def ribbons_to_export(self):
+        # The imported ribbons, with the open one as edited, or just the open one
+        current = (self.current_name or self.ribbon_data.get_ribbon_info().get('name') or "ribbon",
+                   self.ribbon_data.snapshot())
+        if not self.collection:
+            return [current]
+        ribbons = [current if name == self.current_name else (name, ribbon_data) for name, ribbon_data in self.collection]
+        if self.current_name is None:
+            ribbons.append(current)
+        return ribbons
+
+    def start_bulk_task(self, label, function, *args):
+        # Runs in the background behind a non-modal progress dialog
+        from .bulk_io import BulkTask
+
+        if self.bulk_task is not None:
+            QMessageBox.information(self, "Busy", "Another import or export is still running.")
+            return
+        progress = QProgressDialog(f"{label}...", "Cancel", 0, 0, self)
+        progress.setWindowTitle(label)
+        progress.setWindowModality(Qt.WindowModality.NonModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        self.bulk_task = BulkTask(function, *args, parent=self)
+        self.bulk_task.progress.connect(partial(self.on_bulk_progress, progress, label))
+        self.bulk_task.finished.connect(partial(self.on_bulk_finished, progress, label))
+        progress.canceled.connect(self.bulk_task.cancel)
+        self.bulk_task.start()
+
+    def on_bulk_progress(self, progress, label, done, total, name):
+        progress.setMaximum(total)
+        progress.setValue(done)
+        progress.setLabelText(f"{label} {name} ({done}/{total})")
+
+    def on_bulk_finished(self, progress, label, summary):
+        progress.close()
+        # The worker thread has nothing left to do after emitting finished
+        self.bulk_task.wait()
+        self.bulk_task.deleteLater()
+        self.bulk_task = None
+        if 'decorations' in summary:
+            self.collection = summary['decorations']
+            self.current_name = None
+        self.show_bulk_report(label, summary)
+
+    def show_bulk_report(self, label, summary):
+        text = f"{label} finished: {summary['done']} of {summary['total']} succeeded in {summary['elapsed']:.1f}s."
+        if summary['cancelled']:
+            text += " Cancelled before the rest were started."
+        if 'decorations' in summary and summary['decorations']:
+            text += " Use File > Open Imported to open one."
+        report = QMessageBox(QMessageBox.Icon.Warning if summary['failed'] else QMessageBox.Icon.Information,
+                             label, text, QMessageBox.StandardButton.Ok, self)
+        if summary['failed']:
+            report.setInformativeText(f"{len(summary['failed'])} failed, see the details.")
+            report.setDetailedText("\n".join(f"{name}: {error}" for name, error in summary['failed']))
+        report.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        report.show()
+
     def save_as_png(self):
         filename, _ = QFileDialog.getSaveFileName(self, "Save Ribbon as PNG", "", "PNG Files (*.png)")
         if filename:
+            self.redraw.flush()
             RibbonDrawer.save_as_png(self.ribbon_data, filename)
 
-    def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            pos = self.ribbon_label.mapFrom(self, event.pos())
-            if 0 <= pos.x() <= RIBBON_WIDTH and 0 <= pos.y() <= RIBBON_HEIGHT:
-                self.place_device(pos.x(), pos.y())
+    def save_high_res_png(self):
+        # Drawn in strips on a background thread, so even 16K wide exports stay small in memory
+        from .tiled_export import write_tiled_png
+
+        width, ok = QInputDialog.getInt(self, "Save as High-Res PNG", "Width in pixels:", 8192, RIBBON_WIDTH, 65536)
+        if not ok:
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Save as High-Res PNG", "", "PNG Files (*.png)")
+        if filename:
+            size = (width, round(width * RIBBON_HEIGHT / RIBBON_WIDTH))
+            self.start_bulk_task("Saving", write_tiled_png, self.ribbon_data.snapshot(), filename, size)
+
+    def hit_index(self):
+        # Devices then the logo, in drawing order, rebuilt only after they change
+        versions = (self.ribbon_data.versions['devices'], self.ribbon_data.versions['logo'])
+        if self._hit_index[0] != versions:
+            index = GridIndex()
+            for i, rect in enumerate(layout_devices(self.ribbon_data.ribbon.devices, RIBBON_WIDTH, RIBBON_HEIGHT)):
+                index.insert(('device', i), rect)
+            rect = logo_rect(self.ribbon_data.ribbon)
+            if rect is not None:
+                index.insert(('logo',), rect)
+            self._hit_index = (versions, index)
+        return self._hit_index[1]
+
+    def item_rect(self, item):
+        return self.hit_index().rect(item) if item else None
+
+    def item_offset(self, item):
+        if item[0] == 'logo':
+            return self.ribbon_data.ribbon.logo_offset
+        device = self.ribbon_data.ribbon.devices[item[1]]
+        return device.offset_x, device.offset_y
+
+    def on_canvas_pressed(self, x, y):
+        item = self.hit_index().topmost(x, y)
+        self.selected_item = item
+        self.canvas.set_selection(self.item_rect(item))
+        if item is not None:
+            self.drag = (item, x, y, self.item_offset(item))
+            return
+        index = self.ribbon_data.stripe_runs().stripe_at(x)
+        if index is not None:
+            self.stripe_selector.setCurrentIndex(index + 1)
+        else:
+            self.place_device(x, y)
+
+    def on_canvas_moved(self, x, y):
+        if self.drag is None:
+            self.hover(x, y)
+            return
+        item, start_x, start_y, (offset_x, offset_y) = self.drag
+        offset_x, offset_y = offset_x + x - start_x, offset_y + y - start_y
+        if item[0] == 'logo':
+            self.ribbon_data.move_logo(offset_x, offset_y, merge=True)
+        else:
+            self.ribbon_data.move_device(item[1], offset_x, offset_y, merge=True)
+        self.redraw.request()
+
+    def on_canvas_released(self, x, y):
+        if self.drag is not None:
+            self.drag = None
+            self.ribbon_data.history.seal()
+
+    def hover(self, x, y):
+        item = self.hit_index().topmost(x, y)
+        if item is not None:
+            self.canvas.setCursor(Qt.CursorShape.SizeAllCursor)
+            self.canvas.setToolTip("Logo" if item[0] == 'logo' else self.ribbon_data.ribbon.devices[item[1]].name)
+            return
+        index = self.ribbon_data.stripe_runs().stripe_at(x)
+        if index is None:
+            self.canvas.unsetCursor()
+            self.canvas.setToolTip("")
+        else:
+            self.canvas.setCursor(Qt.CursorShape.PointingHandCursor)
+            self.canvas.setToolTip(f"Stripe {index + 1} (click to select)")
 
     def place_device(self, x, y):
-        device_input = get_device_input(self, default_x=x, default_y=y)
-        if device_input:
-            name, color, x, y = device_input
-            self.ribbon_data.add_device(name, color, x, y)
-            self.draw_ribbon()
+        # Adds a device from the picker, moved so it is centred where the ribbon was clicked
+        from .device_selector import DeviceSelector
+
+        device_selector = DeviceSelector(self, self.ribbon_data.load_available_devices())
+        if device_selector.exec():
+            selected_device = device_selector.selected_device
+            device_x, device_y, width, height = self.device_geometry(selected_device)
+            devices = self.ribbon_data.ribbon.devices
+            candidate = Device(selected_device['name'], selected_device['path'], device_x, device_y, width, height)
+            rect_x, rect_y, rect_width, rect_height = layout_devices(devices + [candidate], RIBBON_WIDTH, RIBBON_HEIGHT)[-1]
+            self.ribbon_data.add_device(selected_device['name'], selected_device['path'], device_x, device_y, width, height,
+                                        x - rect_x - rect_width // 2, y - rect_y - rect_height // 2)
+            self.selected_item = ('device', len(devices) - 1)
+            self.redraw.request()
 
     def toggle_mirror_stripe(self):
-        index = select_item(self, "Toggle Mirror Stripe", "Select stripe to mirror:", [f"Stripe at x={s['x']}, width={s['width']}" for s in self.ribbon_data.data['stripes']])
+        index = select_item(self, "Toggle Mirror Stripe", "Select stripe to mirror:", [f"Stripe at x={s.x}, width={s.width}" for s in self.ribbon_data.ribbon.stripes])
         if index is not None:
-            stripe = self.ribbon_data.data['stripes'][index]
-            stripe['mirrored'] = not stripe.get('mirrored', False)
-            self.draw_ribbon()
+            self.ribbon_data.toggle_mirror(index)
+            self.redraw.request()
 
     def toggle_texture(self):
-        self.ribbon_data.data['texture_enabled'] = not self.ribbon_data.data['texture_enabled']
-        self.draw_ribbon()
+        self.ribbon_data.set_texture_enabled(not self.ribbon_data.ribbon.texture_enabled)
+        self.redraw.request()
 
     def load_available_devices(self):
         self.available_devices = self.ribbon_data.load_available_devices()
         
     def add_gold_frame(self):
         self.ribbon_data.set_frame('gold')
-        self.draw_ribbon()
+        self.redraw.request()
 
     def add_silver_frame(self):
         self.ribbon_data.set_frame('silver')
-        self.draw_ribbon()
+        self.redraw.request()
 
     def remove_frame(self):
         self.ribbon_data.remove_frame()
-        self.draw_ribbon()
+        self.redraw.request()
 
     def add_logo(self):
-        logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logo', 'Super Earth Brand 03 White.png')
-        if os.path.exists(logo_path):
-            self.ribbon_data.set_logo(logo_path)
-            self.draw_ribbon()
+        logo = asset_catalog.get('logos', 'Super Earth Brand 03 White')
+        if logo is not None:
+            self.ribbon_data.set_logo(logo.path)
+            self.redraw.request()
         else:
             QMessageBox.warning(self, "Logo Not Found", "The Super Earth logo file was not found in the logo directory.")
 
     def remove_logo(self):
         self.ribbon_data.remove_logo()
-        self.draw_ribbon()
+        self.redraw.request()
 
     def show_about(self):
         about_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ABOUT.md')
@@ -326,20 +560,28 @@ class RibbonDesigner(QMainWindow):
         QMessageBox.information(self, "Ribbon Information", message)
         
     def on_stripe_selected(self, index):
+        # Syncing the sliders to the selection must not write back into the stripe
+        self.x_slider.blockSignals(True)
+        self.width_slider.blockSignals(True)
         if index == 0:  # New Stripe
             self.x_slider.setValue(0)
             self.width_slider.setValue(50)
             self.current_stripe_color = QColor("#FFFFFF")
-        elif 0 < index <= len(self.ribbon_data.data['stripes']):
-            stripe = self.ribbon_data.data['stripes'][index - 1]
-            self.x_slider.setValue(stripe['x'])
-            self.width_slider.setValue(stripe['width'])
-            self.current_stripe_color = QColor(stripe['color'])
+        elif 0 < index <= len(self.ribbon_data.ribbon.stripes):
+            stripe = self.ribbon_data.ribbon.stripes[index - 1]
+            self.x_slider.setValue(stripe.x)
+            self.width_slider.setValue(stripe.width)
+            self.current_stripe_color = QColor(stripe.color)
+        self.x_slider.blockSignals(False)
+        self.width_slider.blockSignals(False)
         self.update_color_button()
 
     def on_stripe_changed(self):
         if self.stripe_selector.currentIndex() > 0:
-            self.apply_stripe_changes(draw=True)
+            self.apply_stripe_changes(draw=True, merge=True)
+
+    def end_stripe_drag(self):
+        self.ribbon_data.history.seal()
 
     def choose_stripe_color(self):
         current_color = self.current_stripe_color if hasattr(self, 'current_stripe_color') else QColor("#FFFFFF")
@@ -352,7 +594,7 @@ class RibbonDesigner(QMainWindow):
     def update_color_button(self):
         self.color_button.setStyleSheet(f"background-color: {self.current_stripe_color.name()}")
 
-    def apply_stripe_changes(self, draw=False):
+    def apply_stripe_changes(self, draw=False, merge=False):
         x = self.x_slider.value()
         width = self.width_slider.value()
         color = self.current_stripe_color.name()
@@ -360,16 +602,16 @@ class RibbonDesigner(QMainWindow):
         if index == 0:  # New Stripe
             self.ribbon_data.add_stripe(x, width, color)
             self.update_stripe_selector()
-        elif 0 < index <= len(self.ribbon_data.data['stripes']):
-            self.ribbon_data.edit_stripe(index - 1, x, width, color, self.ribbon_data.data['stripes'][index - 1]['mirrored'])
+        elif 0 < index <= len(self.ribbon_data.ribbon.stripes):
+            self.ribbon_data.edit_stripe(index - 1, x, width, color, self.ribbon_data.ribbon.stripes[index - 1].mirrored, merge)
         if draw:
-            self.draw_ribbon()
+            self.redraw.request()
 
     def update_stripe_selector(self):
         current_index = self.stripe_selector.currentIndex()
         self.stripe_selector.clear()
         self.stripe_selector.addItem("New Stripe")
-        for i, stripe in enumerate(self.ribbon_data.data['stripes']):
+        for i, stripe in enumerate(self.ribbon_data.ribbon.stripes):
             self.stripe_selector.addItem(f"Stripe {i+1}")
         if current_index < self.stripe_selector.count():
             self.stripe_selector.setCurrentIndex(current_index)
@@ -1,14 +1,62 @@
-import os
-from PyQt6.QtGui import QPixmap, QPainter, QColor, QBrush, QLinearGradient
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QBrush, QLinearGradient
+from PyQt6.QtCore import Qt, QPoint, QRect, QRectF
+from functools import lru_cache
+from .asset_cache import asset_cache
+from .device_layout import layout_devices, logo_rect
+from .asset_catalog import asset_catalog
+from .render_cache import default_render_cache
+from .render_metrics import render_metrics
+from .ribbon_model import RIBBON_WIDTH, RIBBON_HEIGHT, BACKENDS, EXPORT_PRESETS, resolve_size
+
+TEXTURE_ALPHA = 20
+# Scaled assets up to this many pixels are cached. Larger ones only happen at
+# print sizes, where the painter scales just the part inside its clip instead.
+MAX_CACHED_SCALE_PIXELS = 4096 * 2048
+# PNG exports larger than this are drawn and written in strips, see tiled_export
+MAX_DIRECT_EXPORT_PIXELS = 4096 * 2048
+
+
+def _scale_span(start, length, scale):
+    # Maps [start, start + length) in ribbon coordinates to whole target pixels
+    x0 = round(start * scale)
+    return x0, round((start + length) * scale) - x0
+
+
+def _draw_asset(painter, path, x, y, width, height, aspect_mode=Qt.AspectRatioMode.KeepAspectRatio):
+    if width * height <= MAX_CACHED_SCALE_PIXELS:
+        painter.drawImage(x, y, asset_cache.scaled(path, width, height, aspect_mode))
+        return
+    source = asset_cache.image(path)
+    if source.isNull():
+        return
+    size = source.size().scaled(width, height, aspect_mode)
+    painter.save()
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+    painter.drawImage(QRect(x, y, size.width(), size.height()), source)
+    painter.restore()
+
+
+@lru_cache(maxsize=16)
+def texture_row_alphas(height):
+    # The texture is a translucent line on every even row of the base ribbon.
+    # At other sizes each target row takes the alpha of the line area it covers.
+    scale = height / RIBBON_HEIGHT
+    alphas = []
+    for row in range(height):
+        top, bottom = row / scale, (row + 1) / scale
+        coverage = 0.0
+        line = int(top) - int(top) % 2
+        while line < bottom:
+            coverage += max(0.0, min(bottom, line + 1) - max(top, line))
+            line += 2
+        alphas.append(round(TEXTURE_ALPHA * coverage * scale))
+    return tuple(alphas)
 
-RIBBON_WIDTH = 1024
-RIBBON_HEIGHT = 282
 
 class RibbonDrawer:
     @staticmethod
-    def draw_ribbon(ribbon_data, painter=None, draw_outline=False, exclude_devices=False):
-        width, height = RIBBON_WIDTH, RIBBON_HEIGHT
+    def draw_ribbon(ribbon_data, painter=None, draw_outline=False, exclude_devices=False,
+                    width=RIBBON_WIDTH, height=RIBBON_HEIGHT):
         if painter is None:
             pixmap = QPixmap(width, height)
             pixmap.fill(Qt.GlobalColor.transparent)
@@ -17,95 +65,165 @@ class RibbonDrawer:
         else:
             should_end_painter = False
 
-        # Draw background
-        painter.fillRect(0, 0, width, height, QColor(ribbon_data.data['background']))
-        
-        # Draw stripes
-        for stripe in ribbon_data.data['stripes']:
-            painter.fillRect(stripe['x'], 0, stripe['width'], height, QColor(stripe['color']))
-            if stripe.get('mirrored', False):
-                mirrored_x = width - stripe['x'] - stripe['width']
-                painter.fillRect(mirrored_x, 0, stripe['width'], height, QColor(stripe['color']))
-        
+        RibbonDrawer.draw_background(painter, ribbon_data, width, height)
+        RibbonDrawer.draw_stripes(painter, ribbon_data, width, height)
+
         # Apply texture if enabled
-        if ribbon_data.data['texture_enabled']:
+        if ribbon_data.ribbon.texture_enabled:
             RibbonDrawer.apply_texture(painter, width, height)
-        
-        # Draw devices
+
         if not exclude_devices:
-            devices = ribbon_data.data['devices']
-            total_width = sum(device['width'] for device in devices)
-            available_width = RIBBON_WIDTH * 0.8  # 80% of ribbon width
-            if total_width > available_width:
-                scale_factor = available_width / total_width
-                for device in devices:
-                    device['width'] = int(device['width'] * scale_factor)
-                    device['height'] = int(device['height'] * scale_factor)
-
-            max_height = RIBBON_HEIGHT // 3  # One-third of the ribbon height
-            x_offset = (RIBBON_WIDTH - total_width) // 2
-            for device in devices:
-                device_pixmap = QPixmap(device['path'])
-                scaled_height = min(device['height'], max_height)
-                scaled_width = int(scaled_height * (device['width'] / device['height']))
-                scaled_pixmap = device_pixmap.scaled(scaled_width, scaled_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                y_offset = (RIBBON_HEIGHT - scaled_height) // 2
-                painter.drawPixmap(x_offset, y_offset, scaled_pixmap)
-                x_offset += scaled_width
-        
-        # Draw logo if set
-        if ribbon_data.data['logo']:
-            logo_pixmap = QPixmap(ribbon_data.data['logo'])
-            if not logo_pixmap.isNull():
-                logo_height = RIBBON_HEIGHT - 40  # 20 pixels from top and bottom
-                logo_width = int(logo_height * (logo_pixmap.width() / logo_pixmap.height()))
-                scaled_logo = logo_pixmap.scaled(logo_width, logo_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                logo_x = (RIBBON_WIDTH - logo_width) // 2
-                logo_y = 20  # 20 pixels from the top
-                painter.drawPixmap(logo_x, logo_y, scaled_logo)
-            else:
-                print("Warning: Failed to load logo image")
+            RibbonDrawer.draw_devices(painter, ribbon_data, width, height)
+
+        RibbonDrawer.draw_logo(painter, ribbon_data, width, height)
+        RibbonDrawer.draw_frame(painter, ribbon_data, width, height)
 
-        # Draw frame if set
-        if ribbon_data.data['frame']:
-            frame_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frames', f"{ribbon_data.data['frame'].capitalize()}-Frame.png")
-            frame_pixmap = QPixmap(frame_path)
-            scaled_frame = frame_pixmap.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            painter.drawPixmap(0, 0, scaled_frame)
-        
         # Draw preview outline only if requested
         if draw_outline:
-            painter.setPen(Qt.PenStyle.DashLine)
-            painter.drawRect(0, 0, width, height)
-            
+            RibbonDrawer.draw_outline(painter, width, height)
+
         if should_end_painter:
             painter.end()
             return pixmap
 
     @staticmethod
+    @render_metrics.timed('background')
+    def draw_background(painter, ribbon_data, width, height):
+        painter.fillRect(0, 0, width, height, QColor.fromRgba(ribbon_data.ribbon.background_argb))
+
+    @staticmethod
+    @render_metrics.timed('stripes')
+    def draw_stripes(painter, ribbon_data, width, height):
+        # Only the runs left visible after occlusion, each from its topmost opaque stripe up
+        scale = width / RIBBON_WIDTH
+        runs = ribbon_data.stripe_runs()
+        if painter.hasClipping():
+            # A partial redraw only walks the runs inside the clip
+            clip = painter.clipBoundingRect()
+            runs = runs.runs_between(int(clip.left() / scale), int(clip.right() / scale) + 2)
+        else:
+            runs = runs.runs
+        for start, end, layers in runs:
+            if layers:
+                x, run_width = _scale_span(start, end - start, scale)
+                for stripe in layers:
+                    painter.fillRect(x, 0, run_width, height, QColor.fromRgba(stripe.argb))
+
+    @staticmethod
+    @render_metrics.timed('devices')
+    def draw_devices(painter, ribbon_data, width, height):
+        scale_x, scale_y = width / RIBBON_WIDTH, height / RIBBON_HEIGHT
+        devices = ribbon_data.ribbon.devices
+        clip = painter.clipBoundingRect() if painter.hasClipping() else None
+        for device, (x, y, device_width, device_height) in zip(devices, layout_devices(devices, RIBBON_WIDTH, RIBBON_HEIGHT)):
+            x, device_width = _scale_span(x, device_width, scale_x)
+            y, device_height = _scale_span(y, device_height, scale_y)
+            if clip is not None and not clip.intersects(QRectF(x, y, device_width, device_height)):
+                continue
+            _draw_asset(painter, device.path, x, y, device_width, device_height)
+
+    @staticmethod
+    @render_metrics.timed('logo')
+    def draw_logo(painter, ribbon_data, width, height):
+        logo = ribbon_data.ribbon.logo
+        if logo:
+            rect = logo_rect(ribbon_data.ribbon)
+            if rect is not None:
+                logo_x, logo_y, logo_width, logo_height = rect
+                logo_x, logo_width = _scale_span(logo_x, logo_width, width / RIBBON_WIDTH)
+                logo_y, logo_height = _scale_span(logo_y, logo_height, height / RIBBON_HEIGHT)
+                _draw_asset(painter, logo, logo_x, logo_y, logo_width, logo_height)
+            else:
+                print("Warning: Failed to load logo image")
+
+    @staticmethod
+    @render_metrics.timed('frame')
+    def draw_frame(painter, ribbon_data, width, height):
+        if ribbon_data.ribbon.frame:
+            _draw_asset(painter, asset_catalog.frame_path(ribbon_data.ribbon.frame), 0, 0, width, height,
+                        Qt.AspectRatioMode.IgnoreAspectRatio)
+
+    @staticmethod
+    @render_metrics.timed('outline')
+    def draw_outline(painter, width, height):
+        painter.setPen(Qt.PenStyle.DashLine)
+        painter.drawRect(0, 0, width, height)
+
+    @staticmethod
+    @render_metrics.timed('texture')
     def apply_texture(painter, width, height):
-        texture = QPixmap(width, height)
+        # Only the rows inside the clip are built, so a strip never needs the full-height texture
+        top, bottom = 0, height
+        if painter.hasClipping():
+            clip = painter.clipBoundingRect()
+            top, bottom = max(0, int(clip.top())), min(height, int(clip.bottom()) + 1)
+            if bottom <= top:
+                return
+        texture = QImage(width, bottom - top, QImage.Format.Format_ARGB32_Premultiplied)
         texture.fill(Qt.GlobalColor.transparent)
         texture_painter = QPainter(texture)
-        
+
         # Create horizontal lines
-        for i, _ in enumerate(range(0, height, 2)):
-            texture_painter.setPen(QColor(0, 0, 0, 20))
-            texture_painter.drawLine(0, i * 2, width, i * 2)
-        
+        alphas = texture_row_alphas(height)
+        for row in range(top, bottom):
+            if alphas[row]:
+                texture_painter.fillRect(0, row - top, width, 1, QColor(0, 0, 0, alphas[row]))
+
         texture_painter.end()
-        
+
         # Apply texture with alpha blending
         painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-        painter.drawPixmap(0, 0, texture)
+        painter.drawImage(0, top, texture)
 
     @staticmethod
-    def save_as_png(ribbon_data, filename):
-        _, _ = RIBBON_WIDTH, RIBBON_HEIGHT
-        target_width, target_height = 1024, 282
-
-        pixmap = RibbonDrawer.draw_ribbon(ribbon_data, draw_outline=False)
-        
-        # Downscale the image
-        scaled_pixmap = pixmap.scaled(target_width, target_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        scaled_pixmap.save(filename, "PNG")
\ No newline at end of file
+    def render_image(ribbon_data, width=RIBBON_WIDTH, height=RIBBON_HEIGHT, backend='qpainter'):
+        # The numpy backend only draws at the base size; other sizes use QPainter
+        if backend == 'numpy' and (width, height) == (RIBBON_WIDTH, RIBBON_HEIGHT):
+            from .numpy_backend import render_image
+            return render_image(ribbon_data)
+
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        RibbonDrawer.draw_ribbon(ribbon_data, painter, width=width, height=height)
+        painter.end()
+        return image
+
+    @staticmethod
+    def save_as_png(ribbon_data, filename, backend='qpainter', cache=None):
+        # The ribbon is drawn at the export size, so there is nothing left to rescale
+        return RibbonDrawer.export_pngs(ribbon_data, [(filename, (RIBBON_WIDTH, RIBBON_HEIGHT))], backend, cache)
+
+    @staticmethod
+    def export_pngs(ribbon_data, outputs, backend='qpainter', cache=None):
+        # outputs is a list of (filename, size) pairs, where size is anything
+        # resolve_size accepts. Every size is drawn natively in one call, and
+        # each device, logo and frame image is decoded only once for all of them.
+        # Renders are reused from the render cache (the default one unless a
+        # cache or False is passed) when nothing that affects them has changed.
+        if cache is None:
+            cache = default_render_cache()
+        results = []
+        for filename, size in outputs:
+            width, height = resolve_size(size)
+            key = None
+            if cache:
+                try:
+                    key = cache.key_for(ribbon_data, (width, height))
+                    if cache.fetch(key, filename):
+                        results.append(True)
+                        continue
+                except OSError as e:
+                    print(f"Warning: Render cache unavailable: {e}")
+            if width * height > MAX_DIRECT_EXPORT_PIXELS:
+                from .tiled_export import write_tiled_png
+                saved = write_tiled_png(ribbon_data, filename, (width, height))['done'] > 0
+            else:
+                saved = RibbonDrawer.render_image(ribbon_data, width, height, backend).save(filename, "PNG")
+            if saved and key:
+                try:
+                    cache.store(key, filename)
+                except OSError as e:
+                    print(f"Warning: Could not store render in cache: {e}")
+            results.append(saved)
+        return all(results)
@@ -0,0 +1,146 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+LIBRARY_EXTENSION = '.rodlib'
+MAGIC = b'RODLIB01'
+# Magic, then the offset and length of the JSON index that follows the records
+HEADER = struct.Struct('<8sQQ')
+
+
+class LibraryError(ValueError):
+    pass
+
+
+# Single-file container for many decorations. Each record is the decoration's
+# JSON, stored back to back; the index at the end maps names and info fields
+# to record offsets, so one decoration can be read through mmap without
+# parsing any of the others.
+class RibbonLibrary:
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise LibraryError(f"{self.path} is empty, not a ribbon library")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise LibraryError(f"{self.path} is not a ribbon library")
+        magic, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise LibraryError(f"{self.path} is not a ribbon library")
+        try:
+            index = json.loads(self._map[index_offset:index_offset + index_length])
+            self._entries = {entry['name']: entry for entry in index['entries']}
+        except (ValueError, KeyError, TypeError):
+            self.close()
+            raise LibraryError(f"{self.path} has a damaged index")
+        self._by_title = {}
+        for entry in index['entries']:
+            self._by_title.setdefault(entry['info'].get('name', '').casefold(), entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return self._entry(name) is not None
+
+    def names(self):
+        return list(self._entries)
+
+    def info(self, name):
+        return self._require(name)['info']
+
+    def search(self, query):
+        query = query.casefold()
+        return [name for name, entry in self._entries.items()
+                if query in name.casefold() or any(query in str(value).casefold() for value in entry['info'].values())]
+
+    def get(self, name):
+        entry = self._require(name)
+        return json.loads(self._map[entry['offset']:entry['offset'] + entry['length']])
+
+    def _entry(self, name):
+        # Entries are keyed by file name, but the ribbon's display name works too
+        return self._entries.get(name) or self._by_title.get(name.casefold())
+
+    def _require(self, name):
+        entry = self._entry(name)
+        if entry is None:
+            raise KeyError(f"No decoration named {name!r} in {self.path}")
+        return entry
+
+    @staticmethod
+    def write(path, decorations):
+        # decorations is an iterable of (name, JSON-ready dict) pairs
+        path = str(path)
+        temp_path = f"{path}.tmp"
+        entries = []
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, 0, 0))
+                for name, data in decorations:
+                    record = json.dumps(data).encode('utf-8')
+                    entries.append({'name': name, 'offset': file.tell(), 'length': len(record),
+                                    'info': data.get('info', {})})
+                    file.write(record)
+                index_offset = file.tell()
+                index = json.dumps({'entries': entries}).encode('utf-8')
+                file.write(index)
+                file.seek(0)
+                file.write(HEADER.pack(MAGIC, index_offset, len(index)))
+            os.replace(temp_path, path)
+        except BaseException:
+            # A decoration that fails to load leaves no half-written library behind
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return len(entries)
+
+
+def pack_folder(folder, library_path):
+    from .ribbon_data import RibbonData
+
+    base_dir = os.path.dirname(os.path.abspath(library_path))
+
+    def decorations():
+        for path in sorted(Path(folder).glob('*.json')):
+            ribbon_data = RibbonData()
+            try:
+                ribbon_data.load_from_file(str(path))
+            except (OSError, ValueError) as e:
+                raise LibraryError(f"{path.name}: {e}") from e
+            yield path.stem, ribbon_data.to_json_dict(base_dir)
+
+    return RibbonLibrary.write(library_path, decorations())
+
+
+def unpack_library(library_path, folder):
+    from .ribbon_data import RibbonData
+
+    os.makedirs(folder, exist_ok=True)
+    with RibbonLibrary(library_path) as library:
+        for name in library.names():
+            ribbon_data = RibbonData()
+            ribbon_data.load_from_library(library, name)
+            ribbon_data.save_to_file(os.path.join(folder, f"{name}.json"))
+        return len(library)
@@ -0,0 +1,194 @@
+import math
+import os
+from dataclasses import dataclass, field, replace
+
+FRAME_TYPES = (None, 'gold', 'silver')
+INFO_FIELDS = ('name', 'award_details', 'device_details')
+HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+RIBBON_WIDTH = 1024
+RIBBON_HEIGHT = 282
+BACKENDS = ('qpainter', 'numpy')
+FRAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frames')
+
+# Named export sizes, as scales of the base ribbon size
+EXPORT_PRESETS = {
+    'game': 1.0,
+    'thumbnail': 0.25,
+    'print': 3.75,  # 3840 pixels wide
+}
+
+
+def frame_path(frame_type):
+    return os.path.join(FRAMES_DIR, f"{frame_type.capitalize()}-Frame.png")
+
+
+def resolve_size(spec):
+    # Accepts a preset name, a scale such as '2x' or a size such as '2048x564'
+    if isinstance(spec, (tuple, list)):
+        width, height = int(spec[0]), int(spec[1])
+    else:
+        if isinstance(spec, (int, float)):
+            scale = spec
+        elif spec in EXPORT_PRESETS:
+            scale = EXPORT_PRESETS[spec]
+        elif spec.endswith('x'):
+            scale = float(spec[:-1])
+        else:
+            width, _, height = spec.partition('x')
+            scale = None
+        if scale is None:
+            width, height = int(width), int(height)
+        elif math.isfinite(scale):
+            width, height = round(RIBBON_WIDTH * scale), round(RIBBON_HEIGHT * scale)
+        else:
+            raise ValueError(f"Invalid scale {spec!r}")
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Size {spec!r} must be at least 1x1 pixels")
+    return width, height
+
+
+def _parse_qcolor(value):
+    # Anything else QColor reads, such as 'red' or '#rrrgggbbb', as older decorations may use
+    from PyQt6.QtGui import QColor
+
+    color = QColor(value)
+    if not color.isValid():
+        raise ValueError(f"Invalid colour {value!r}, expected a hex colour such as '#ff0000' or a colour name")
+    return color.rgba()
+
+
+def parse_color(value):
+    # Returns the colour as a 0xAARRGGBB integer, ready for QColor.fromRgba
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid colour {value!r}, expected a hex colour such as '#ff0000'")
+    digits = value[1:] if value.startswith('#') else ''
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    if len(digits) not in (6, 8) or not all(c in HEX_DIGITS for c in digits):
+        return _parse_qcolor(value)
+    argb = int(digits, 16)
+    return argb if len(digits) == 8 else 0xFF000000 | argb
+
+
+def _int_field(data, key, kind, default=None):
+    if not isinstance(data, dict):
+        raise ValueError(f"{kind} must be a JSON object, got {data!r}")
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{kind} field {key!r} must be a number, got {value!r}")
+    return int(value)
+
+
+@dataclass(frozen=True, slots=True)
+class Stripe:
+    x: int
+    width: int
+    color: str
+    mirrored: bool = False
+    argb: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'argb', parse_color(self.color))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(_int_field(data, 'x', 'Stripe'), _int_field(data, 'width', 'Stripe'),
+                   data.get('color'), bool(data.get('mirrored', False)))
+
+    def to_dict(self):
+        return {'x': self.x, 'width': self.width, 'color': self.color, 'mirrored': self.mirrored}
+
+
+@dataclass(frozen=True, slots=True)
+class Device:
+    name: str
+    path: str
+    x: int
+    y: int
+    width: int
+    height: int
+    color: str | None = None
+    offset_x: int = 0  # Moved by hand from its place in the centred device row
+    offset_y: int = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        width = _int_field(data, 'width', 'Device')
+        height = _int_field(data, 'height', 'Device')
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Device {data.get('name')!r} must have a positive size")
+        return cls(str(data.get('name', '')), data.get('path'), _int_field(data, 'x', 'Device', 0),
+                   _int_field(data, 'y', 'Device', 0), width, height, data.get('color'),
+                   _int_field(data, 'offset_x', 'Device', 0), _int_field(data, 'offset_y', 'Device', 0))
+
+    def to_dict(self):
+        data = {'name': self.name, 'path': self.path, 'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height}
+        if self.color is not None:
+            data['color'] = self.color
+        if self.offset_x or self.offset_y:
+            data['offset_x'], data['offset_y'] = self.offset_x, self.offset_y
+        return data
+
+
+@dataclass(slots=True)
+class Ribbon:
+    background: str = '#000000'
+    stripes: list = field(default_factory=list)
+    devices: list = field(default_factory=list)
+    texture_enabled: bool = False
+    frame: str | None = None  # Can be 'gold', 'silver', or None
+    logo: str | None = None  # Will store the path to the logo image
+    info: dict = field(default_factory=lambda: dict.fromkeys(INFO_FIELDS, ''))
+    logo_offset: tuple = (0, 0)
+    background_argb: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.background_argb = parse_color(self.background)
+
+    def copy(self):
+        # Stripes and devices are immutable, so only the containers need copying
+        return replace(self, stripes=list(self.stripes), devices=list(self.devices), info=dict(self.info))
+
+    def set(self, key, value):
+        setattr(self, key, value)
+        if key == 'background':
+            self.background_argb = parse_color(value)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("Ribbon data must be a JSON object")
+        frame = data.get('frame')
+        if frame not in FRAME_TYPES:
+            raise ValueError(f"Unknown frame {frame!r}")
+        info = data.get('info') or {}
+        if not isinstance(info, dict):
+            raise ValueError(f"info must be a JSON object, got {info!r}")
+        logo_offset = data.get('logo_offset') or (0, 0)
+        if not isinstance(logo_offset, (list, tuple)) or len(logo_offset) != 2 or \
+                any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in logo_offset):
+            raise ValueError(f"logo_offset must be an [x, y] pair of numbers, got {logo_offset!r}")
+        return cls(
+            background=data.get('background', '#000000'),
+            stripes=[Stripe.from_dict(stripe) for stripe in data.get('stripes', [])],
+            devices=[Device.from_dict(device) for device in data.get('devices', [])],
+            texture_enabled=bool(data.get('texture_enabled', False)),
+            frame=frame,
+            logo=data.get('logo') or None,
+            info={key: str(info.get(key, '')) for key in INFO_FIELDS},
+            logo_offset=(int(logo_offset[0]), int(logo_offset[1])),
+        )
+
+    def to_dict(self):
+        data = {
+            'background': self.background,
+            'stripes': [stripe.to_dict() for stripe in self.stripes],
+            'devices': [device.to_dict() for device in self.devices],
+            'texture_enabled': self.texture_enabled,
+            'frame': self.frame,
+            'logo': self.logo,
+            'info': dict(self.info),
+        }
+        if self.logo_offset != (0, 0):
+            data['logo_offset'] = list(self.logo_offset)
+        return data
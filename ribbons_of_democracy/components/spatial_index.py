@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+GRID_CELL = 32  # Pixels per grid cell side
+
+
+# Uniform grid over rectangles, for point hit-tests that only look at the
+# handful of items sharing the point's cell. Items are kept in insertion
+# order, so with drawing order as insertion order the last hit is on top.
+class GridIndex:
+    def __init__(self, cell=GRID_CELL):
+        self.cell = cell
+        self._cells = defaultdict(list)
+        self._rects = {}
+
+    def __len__(self):
+        return len(self._rects)
+
+    def insert(self, key, rect):
+        x, y, width, height = rect
+        if width <= 0 or height <= 0:
+            return
+        order = len(self._rects)
+        self._rects[key] = (order, rect)
+        for cell_x in range(x // self.cell, (x + width - 1) // self.cell + 1):
+            for cell_y in range(y // self.cell, (y + height - 1) // self.cell + 1):
+                self._cells[cell_x, cell_y].append(key)
+
+    def rect(self, key):
+        entry = self._rects.get(key)
+        return entry[1] if entry else None
+
+    def query(self, x, y):
+        # Keys whose rectangle contains the point, bottom to top
+        hits = []
+        for key in self._cells.get((x // self.cell, y // self.cell), ()):
+            rect_x, rect_y, width, height = self._rects[key][1]
+            if rect_x <= x < rect_x + width and rect_y <= y < rect_y + height:
+                hits.append(key)
+        return hits
+
+    def topmost(self, x, y):
+        hits = self.query(x, y)
+        return hits[-1] if hits else None
@@ -0,0 +1,123 @@
+from bisect import bisect_left, bisect_right
+
+OPAQUE = 0xFF000000
+
+
+def _copies(stripes, width):
+    # Every painted span in paint order: each stripe, then its mirror image.
+    # Entries are (start, end, stripe).
+    for stripe in stripes:
+        yield stripe.x, stripe.x + stripe.width, stripe
+        if stripe.mirrored:
+            start = width - stripe.x - stripe.width
+            yield start, start + stripe.width, stripe
+
+
+# The stripe stack flattened into runs of columns that look the same: after
+# occlusion and mirroring, each run lists only the stripes that still show
+# through, bottom to top, starting at the topmost opaque one. Opaque ribbons
+# therefore paint one rectangle per run however many stripes overlap.
+#
+# update() compares the new stripe list with the previous one and only
+# recomputes the columns touched by stripes that were added, removed or
+# changed, so dragging one stripe does not redo the whole stack.
+class StripeRuns:
+    def __init__(self, width):
+        self.width = width
+        self.starts = [0]
+        self.runs = [(0, width, ())]  # (start, end, stripes from bottom to top)
+        self._stripes = ()
+        self._indices = {}
+
+    def copy(self):
+        runs = StripeRuns.__new__(StripeRuns)
+        runs.width = self.width
+        runs.starts = list(self.starts)
+        runs.runs = list(self.runs)
+        runs._stripes = self._stripes
+        runs._indices = self._indices  # Replaced, never changed in place
+        return runs
+
+    def update(self, stripes):
+        old = self._stripes
+        if len(old) == len(stripes) and all(a is b for a, b in zip(old, stripes)):
+            return []
+        prefix = 0
+        limit = min(len(old), len(stripes))
+        while prefix < limit and old[prefix] is stripes[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[len(old) - 1 - suffix] is stripes[len(stripes) - 1 - suffix]:
+            suffix += 1
+
+        changed = list(old[prefix:len(old) - suffix]) + list(stripes[prefix:len(stripes) - suffix])
+        self._stripes = tuple(stripes)
+        self._indices = {id(stripe): index for index, stripe in enumerate(self._stripes)}
+        dirty = self._merge_spans((max(start, 0), min(end, self.width))
+                                  for start, end, _ in _copies(changed, self.width))
+        for start, end in dirty:
+            self._rebuild(start, end)
+        return dirty
+
+    @staticmethod
+    def _merge_spans(spans):
+        merged = []
+        for start, end in sorted(span for span in spans if span[0] < span[1]):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _rebuild(self, start, end):
+        copies = [copy for copy in _copies(self._stripes, self.width) if copy[0] < end and copy[1] > start]
+        bounds = sorted({start, end} | {edge for copy in copies for edge in copy[:2] if start < edge < end})
+        fresh = []
+        for left, right in zip(bounds, bounds[1:]):
+            layers = [stripe for copy_start, copy_end, stripe in copies if copy_start <= left and copy_end >= right]
+            for top in range(len(layers) - 1, -1, -1):
+                if layers[top].argb & OPAQUE == OPAQUE:
+                    layers = layers[top:]
+                    break
+            fresh.append((left, right, tuple(layers)))
+
+        # Splice the new runs in, keeping the parts of the runs cut at either edge
+        first = bisect_right(self.starts, start) - 1
+        last = bisect_right(self.starts, end - 1) - 1
+        head, tail = self.runs[first], self.runs[last]
+        if head[0] < start:
+            fresh.insert(0, (head[0], start, head[2]))
+        if tail[1] > end:
+            fresh.append((end, tail[1], tail[2]))
+        # Take in one more run on each side so equal neighbours merge across the seams
+        if first > 0:
+            first -= 1
+            fresh.insert(0, self.runs[first])
+        if last < len(self.runs) - 1:
+            last += 1
+            fresh.append(self.runs[last])
+        merged = []
+        for run in fresh:
+            if merged and merged[-1][2] == run[2]:
+                merged[-1] = (merged[-1][0], run[1], run[2])
+            else:
+                merged.append(run)
+        self.runs[first:last + 1] = merged
+        self.starts[first:last + 1] = [run[0] for run in merged]
+
+    def runs_between(self, start, end):
+        # The runs that overlap columns [start, end)
+        first = max(0, bisect_right(self.starts, start) - 1)
+        return self.runs[first:bisect_left(self.starts, end)]
+
+    def run_at(self, x):
+        if not 0 <= x < self.width:
+            return None
+        return self.runs[bisect_right(self.starts, x) - 1]
+
+    def stripe_at(self, x):
+        # Index of the topmost stripe painted at column x, or None for background
+        run = self.run_at(x)
+        if run is None or not run[2]:
+            return None
+        return self._indices.get(id(run[2][-1]))
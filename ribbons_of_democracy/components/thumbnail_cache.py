@@ -0,0 +1,62 @@
+import hashlib
+import os
+from pathlib import Path
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import Qt
+from .render_cache import user_cache_dir
+
+THUMBNAIL_SIZE = 48
+
+_default_cache = None
+
+
+def default_thumbnail_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ThumbnailCache(user_cache_dir() / 'thumbnails')
+    return _default_cache
+
+
+# Small PNG thumbnails of asset images, persisted on disk and named after the
+# source path, its mtime and the thumbnail size, so an edited image gets a
+# fresh thumbnail and the stale one is removed.
+class ThumbnailCache:
+    def __init__(self, directory, size=THUMBNAIL_SIZE):
+        self.directory = Path(directory)
+        self.size = size
+        self._memory = {}
+
+    def _stem(self, path):
+        return hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+
+    def thumbnail(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return QImage()
+        cached = self._memory.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        stem = self._stem(path)
+        thumbnail_path = self.directory / f"{stem}_{mtime}_{self.size}.png"
+        image = QImage(str(thumbnail_path))
+        if image.isNull():
+            image = self._generate(path, stem, thumbnail_path)
+        self._memory[path] = (mtime, image)
+        return image
+
+    def _generate(self, path, stem, thumbnail_path):
+        source = QImage(path)
+        if source.isNull():
+            return source
+        image = source.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                              Qt.TransformationMode.SmoothTransformation)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for stale in self.directory.glob(f"{stem}_*.png"):
+                stale.unlink()
+            image.save(str(thumbnail_path), "PNG")
+        except OSError as e:
+            print(f"Warning: Could not save thumbnail for {path}: {e}")
+        return image
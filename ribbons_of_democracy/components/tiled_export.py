@@ -0,0 +1,52 @@
+import time
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import Qt
+from .png_stream import PngWriter
+from .ribbon_drawer import RibbonDrawer, resolve_size
+
+STRIP_BYTES = 16 * 1024 * 1024  # Memory for one strip of the output image
+
+
+def strip_rows(width, strip_bytes=STRIP_BYTES):
+    return max(1, strip_bytes // (width * 4))
+
+
+def write_tiled_png(ribbon_data, filename, size, progress=None, cancel=None, strip_bytes=STRIP_BYTES):
+    # Draws the ribbon at size one horizontal strip at a time, each through the
+    # usual RibbonDrawer stages with the painter translated and clipped to the
+    # strip, and streams the strips into the PNG. Peak memory is one strip and
+    # the source assets, whatever the output size. PngWriter only puts the PNG
+    # at filename once it is complete.
+    start = time.perf_counter()
+    width, height = resolve_size(size)
+    rows = strip_rows(width, strip_bytes)
+    total = -(-height // rows)
+    done = 0
+    try:
+        with PngWriter(filename, width, height) as writer:
+            for top in range(0, height, rows):
+                if cancel is not None and cancel.is_set():
+                    raise InterruptedError("Export cancelled")
+                strip_height = min(rows, height - top)
+                strip = QImage(width, strip_height, QImage.Format.Format_ARGB32_Premultiplied)
+                strip.fill(Qt.GlobalColor.transparent)
+                painter = QPainter(strip)
+                painter.translate(0, -top)
+                painter.setClipRect(0, top, width, strip_height)
+                RibbonDrawer.draw_ribbon(ribbon_data, painter, width=width, height=height)
+                painter.end()
+                writer.write_image(strip)
+                done += 1
+                if progress:
+                    progress(done, total, f"rows {top}-{top + strip_height}")
+    except InterruptedError:
+        pass
+    return {
+        'total': total,
+        'done': done,
+        'failed': [],
+        'cancelled': done < total,
+        'elapsed': time.perf_counter() - start,
+        'width': width,
+        'height': height,
+    }
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QInputDialog, QColorDialog, QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QLabel
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor
-from .ribbon_drawer import RIBBON_WIDTH, RIBBON_HEIGHT
+from .ribbon_drawer import RIBBON_WIDTH
 
 def get_stripe_input(parent, default_x=0, default_width=50, default_color=None):
     dialog = StripeDialog(parent, default_x, default_width, default_color)
@@ -10,17 +10,6 @@ def get_stripe_input(parent, default_x=0, default_width=50, default_color=None):
         return x, width, color.name()
     return None
 
-def get_device_input(parent, default_name="", default_x=0, default_y=50):
-    name, ok = QInputDialog.getText(parent, "Add Device", "Enter device name:", text=default_name)
-    if ok and name:
-        color = QColorDialog.getColor()
-        if color.isValid():
-            x, ok1 = QInputDialog.getInt(parent, "Device Position", "Enter X coordinate:", default_x, 0, RIBBON_WIDTH)
-            y, ok2 = QInputDialog.getInt(parent, "Device Position", "Enter Y coordinate:", default_y, 0, RIBBON_HEIGHT)
-            if ok1 and ok2:
-                return name, color.name(), x, y
-    return None
-
 def select_item(parent, title, prompt, items):
     if not items:
         QMessageBox.information(parent, title, f"No {title.lower()} to select.")
@@ -0,0 +1,177 @@
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from .asset_cache import asset_cache
+from .asset_catalog import KIND_DIRS, asset_catalog
+from .batch_renderer import render_one, render_outputs
+
+POLL_INTERVAL = 0.25  # Seconds between scans of the watched folders
+DEBOUNCE = 0.5  # Quiet seconds after the last change before rebuilding
+
+
+def _outputs(outputs):
+    return [str(path) for path, _ in outputs] if isinstance(outputs, list) else [str(outputs)]
+
+
+# Keeps the PNGs rendered from a decorations folder up to date. Each poll
+# stats the decoration JSON files and every device, logo and frame PNG under
+# the asset roots. A changed JSON re-renders that ribbon; a changed asset
+# re-renders the ribbons that draw it, found through a reverse index from
+# asset paths to decorations. Changes are collected until the folders have
+# been quiet for the debounce time, so a burst of saves renders once.
+class DecorationWatcher:
+    def __init__(self, folder, output_dir, sizes=None, backend='qpainter', use_cache=True, out=print):
+        self.folder = Path(os.path.abspath(folder))
+        self.output_dir = output_dir
+        self.sizes = sizes
+        self.backend = backend
+        self.use_cache = use_cache
+        self.out = out
+        self.renders = 0
+        self._stamps = {}
+        self._uses = {}  # Decoration path to the asset paths it draws
+        self._users = defaultdict(set)  # Asset path to the decorations that draw it
+
+    def watched_dirs(self):
+        return [self.folder] + [root / subdir for root in asset_catalog.roots for subdir in KIND_DIRS.values()]
+
+    def scan(self):
+        # (mtime, size) of every watched file
+        stamps = {}
+        for directory in self.watched_dirs():
+            suffix = '.json' if directory == self.folder else '.png'
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(suffix) and entry.is_file():
+                        stat = entry.stat()
+                        stamps[os.path.abspath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def poll(self):
+        # Paths added, changed or removed since the last poll
+        stamps = self.scan()
+        changed = {path for path in stamps.keys() | self._stamps.keys() if stamps.get(path) != self._stamps.get(path)}
+        self._stamps = stamps
+        return changed
+
+    def is_decoration(self, path):
+        return Path(path).parent == self.folder and path.lower().endswith('.json')
+
+    def dependencies(self, decoration):
+        # The loaded ribbon and the asset paths it uses, as saved and as
+        # resolved, so a device that was missing and is then added counts as
+        # a change to the ribbons that use it
+        from .ribbon_data import RibbonData
+
+        with open(decoration) as file:
+            data = json.load(file)
+        # Collected first, load_from_dict resolves the paths in place
+        devices = data.get('devices', []) if isinstance(data, dict) else []
+        uses = {os.path.abspath(device['path']) for device in devices
+                if isinstance(device, dict) and isinstance(device.get('path'), str)}
+        ribbon_data = RibbonData()
+        ribbon_data.load_from_dict(data, os.path.dirname(decoration))
+        ribbon = ribbon_data.ribbon
+        uses.update(os.path.abspath(device.path) for device in ribbon.devices if device.path)
+        if ribbon.logo:
+            uses.add(os.path.abspath(ribbon.logo))
+        if ribbon.frame:
+            uses.add(os.path.abspath(asset_catalog.frame_path(ribbon.frame)))
+        return uses, ribbon_data
+
+    def index(self, decoration):
+        # Returns the loaded ribbon for rendering, or None if it could not be read
+        self.forget(decoration)
+        try:
+            uses, ribbon_data = self.dependencies(decoration)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read {decoration}: {e}")
+            uses, ribbon_data = set(), None
+        self._uses[decoration] = uses
+        for asset in uses:
+            self._users[asset].add(decoration)
+        return ribbon_data
+
+    def forget(self, decoration):
+        for asset in self._uses.pop(decoration, ()):
+            self._users[asset].discard(decoration)
+            if not self._users[asset]:
+                del self._users[asset]
+
+    def users(self, asset):
+        return set(self._users.get(asset, ()))
+
+    def render(self, decorations):
+        failures = []
+        for decoration in sorted(decorations):
+            ribbon_data = self.index(decoration)
+            label, _, error = render_one(decoration, render_outputs(decoration, self.output_dir, self.sizes),
+                                         self.backend, self.use_cache, ribbon_data)
+            self.renders += 1
+            if error:
+                failures.append((label, error))
+        return failures
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._stamps = self.scan()
+        decorations = [path for path in self._stamps if self.is_decoration(path)]
+        start = time.perf_counter()
+        failures = self.render(decorations)
+        self.report(f"Rendered {len(decorations)} ribbons", start, failures)
+
+    def rebuild(self, changed):
+        # Re-renders what the changed paths affect and removes the outputs of deleted decorations
+        start = time.perf_counter()
+        decorations, reasons = set(), []
+        for path in sorted(changed):
+            if self.is_decoration(path):
+                decorations.add(path)
+                reasons.append(Path(path).name)
+                continue
+            asset_cache.invalidate(path)
+            asset_catalog.invalidate(path)
+            users = self.users(path)
+            decorations |= users
+            reasons.append(f"{Path(path).name} ({len(users)} ribbons)")
+
+        removed = {path for path in decorations if not os.path.exists(path)}
+        for decoration in removed:
+            self.forget(decoration)
+            for output in _outputs(render_outputs(decoration, self.output_dir, self.sizes)):
+                if os.path.exists(output):
+                    os.remove(output)
+        failures = self.render(decorations - removed)
+        message = f"Re-rendered {len(decorations - removed)} ribbons"
+        if removed:
+            message += f", removed {len(removed)}"
+        self.report(f"{message} after changes to {', '.join(reasons)}", start, failures)
+
+    def report(self, message, start, failures):
+        self.out(f"{message} in {time.perf_counter() - start:.2f}s")
+        for label, error in failures:
+            self.out(f"  {label}: {error}")
+
+    def run(self, interval=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+        # Polls until stop() returns true or the user presses Ctrl+C
+        self.start()
+        pending, last_change = set(), 0.0
+        try:
+            while stop is None or not stop():
+                changed = self.poll()
+                now = time.monotonic()
+                if changed:
+                    pending |= changed
+                    last_change = now
+                elif pending and now - last_change >= debounce:
+                    self.rebuild(pending)
+                    pending = set()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
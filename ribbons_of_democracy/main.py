@@ -1,12 +1,55 @@
+import time
+_start = time.perf_counter()  # Before any other import, so startup profiles include them
+
 import sys
-from PyQt6.QtWidgets import QApplication
-from .components.ribbon_designer import RibbonDesigner
+from .cli import COMMANDS, main as cli_main
+
+PROFILE_FLAG = '--profile-startup'
+
+
+class StartupProfile:
+    def __init__(self, start):
+        self.phases = []
+        self.start = self.last = start
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, out=print):
+        out("Startup profile:")
+        for phase, seconds in self.phases:
+            out(f"  {phase:<20} {seconds * 1000:8.1f}ms")
+        out(f"  {'total':<20} {(self.last - self.start) * 1000:8.1f}ms")
+
 
 def main():
-    app = QApplication(sys.argv)
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(cli_main(sys.argv[1:]))
+
+    # Prints how long each phase up to the first frame took, then quits
+    profile = StartupProfile(_start) if PROFILE_FLAG in sys.argv else None
+    argv = [arg for arg in sys.argv if arg != PROFILE_FLAG]
+
+    from PyQt6.QtWidgets import QApplication
+    from .components.ribbon_designer import RibbonDesigner
+    if profile:
+        profile.mark("imports")
+
+    app = QApplication(argv)
+    if profile:
+        profile.mark("QApplication")
     window = RibbonDesigner()
+    if profile:
+        profile.mark("window construction")
     window.show()
+    if profile:
+        app.processEvents()
+        profile.mark("first render")
+        profile.report()
+        sys.exit(0)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
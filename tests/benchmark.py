@@ -0,0 +1,217 @@
+# Benchmarks for the rendering and file I/O hot paths.
+#
+#   python -m tests.benchmark -o results.json
+#   python -m tests.benchmark --compare results.json
+#
+# Runs headless under the offscreen Qt platform. Each case is timed over as
+# many runs as fit in --min-time and reported as min/median/mean seconds.
+# With --compare, cases whose median is more than --threshold slower than the
+# stored baseline are flagged and the exit status is 1.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt6.QtGui import QGuiApplication
+
+from ribbons_of_democracy.components.asset_catalog import asset_catalog
+from ribbons_of_democracy.components.layered_renderer import LayeredRenderer
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+from ribbons_of_democracy.components.ribbon_drawer import RibbonDrawer, RIBBON_WIDTH
+
+DECORATIONS_DIR = Path(__file__).parent.parent / 'decorations'
+STRIPE_COUNTS = (1, 10, 100, 1000, 5000)
+DEVICE_COUNTS = (1, 10, 100, 1000)
+QUICK_STRIPE_COUNTS = (1, 100)
+QUICK_DEVICE_COUNTS = (1, 10)
+DEFAULT_THRESHOLD = 0.25
+
+
+def synthetic_ribbon(stripes=0, devices=0, texture=False, logo=False, frame=None):
+    ribbon_data = RibbonData()
+    ribbon_data.set_background('#203040')
+    for i in range(stripes):
+        width = max(1, RIBBON_WIDTH // max(stripes, 1))
+        ribbon_data.add_stripe((i * width) % RIBBON_WIDTH, width, f"#{(i * 2654435761) & 0xFFFFFF:06x}",
+                               mirrored=i % 3 == 0)
+    available = asset_catalog.devices()
+    for i in range(devices):
+        device = available[i % len(available)]
+        ribbon_data.add_device(device.name, device.path, 0, 0, device.width, device.height)
+    ribbon_data.set_texture_enabled(texture)
+    if logo:
+        ribbon_data.set_logo(asset_catalog.assets('logos')[0].path)
+    if frame:
+        ribbon_data.set_frame(frame)
+    return ribbon_data
+
+
+def shipped_decorations():
+    decorations = {}
+    for path in sorted(DECORATIONS_DIR.glob('*.json')):
+        ribbon_data = RibbonData()
+        ribbon_data.load_from_file(str(path))
+        decorations[path.stem] = (path, ribbon_data)
+    return decorations
+
+
+def nudge_stripe(ribbon_data, renderer):
+    index = len(ribbon_data.ribbon.stripes) - 1
+    stripe = ribbon_data.ribbon.stripes[index]
+    x = RIBBON_WIDTH // 2 + 1 if stripe.x == RIBBON_WIDTH // 2 else RIBBON_WIDTH // 2
+    ribbon_data.edit_stripe(index, x, stripe.width, stripe.color, stripe.mirrored)
+    renderer.render(ribbon_data)
+
+
+def cases(scratch, quick=False):
+    # Yields (name, callable) pairs; every callable does one unit of work
+    stripe_counts = QUICK_STRIPE_COUNTS if quick else STRIPE_COUNTS
+    device_counts = QUICK_DEVICE_COUNTS if quick else DEVICE_COUNTS
+
+    variants = {
+        'plain': synthetic_ribbon(stripes=5),
+        'texture': synthetic_ribbon(stripes=5, texture=True),
+        'logo': synthetic_ribbon(stripes=5, logo=True),
+        'frame': synthetic_ribbon(stripes=5, frame='gold'),
+        'full': synthetic_ribbon(stripes=5, devices=3, texture=True, logo=True, frame='gold'),
+    }
+    for name, ribbon_data in variants.items():
+        yield f"draw_ribbon/{name}", lambda r=ribbon_data: RibbonDrawer.draw_ribbon(r)
+    for count in stripe_counts:
+        ribbon_data = synthetic_ribbon(stripes=count)
+        yield f"draw_ribbon/stripes={count}", lambda r=ribbon_data: RibbonDrawer.draw_ribbon(r)
+    for count in device_counts:
+        ribbon_data = synthetic_ribbon(stripes=5, devices=count)
+        yield f"draw_ribbon/devices={count}", lambda r=ribbon_data: RibbonDrawer.draw_ribbon(r)
+
+    # Moving one narrow stripe back and forth in the designer's renderer,
+    # which only redraws the columns it covered and covers
+    for count in stripe_counts:
+        ribbon_data = synthetic_ribbon(stripes=count, devices=3, texture=True)
+        ribbon_data.add_stripe(RIBBON_WIDTH // 2, 4, '#ff0000')
+        renderer = LayeredRenderer()
+        renderer.render(ribbon_data)
+        yield f"layered_edit/stripes={count}", lambda r=ribbon_data, l=renderer: nudge_stripe(r, l)
+
+    png_path = os.path.join(scratch, 'ribbon.png')
+    for name in ('plain', 'full'):
+        ribbon_data = variants[name]
+        yield f"save_as_png/{name}", lambda r=ribbon_data: RibbonDrawer.save_as_png(r, png_path, cache=False)
+
+    if not quick:
+        # Print-size export, drawn and streamed to the PNG in strips
+        ribbon_data = variants['full']
+        yield "save_as_png/full@8192", lambda r=ribbon_data: RibbonDrawer.export_pngs(r, [(png_path, (8192, 2256))], cache=False)
+
+    for count in stripe_counts:
+        ribbon_data = synthetic_ribbon(stripes=count, devices=min(count, device_counts[-1]))
+        json_path = os.path.join(scratch, f"ribbon-{count}.json")
+        ribbon_data.save_to_file(json_path)
+        yield f"save_to_file/items={count}", lambda r=ribbon_data, p=json_path: r.save_to_file(p)
+        yield f"load_from_file/items={count}", lambda p=json_path: RibbonData().load_from_file(p)
+
+    for stem, (path, ribbon_data) in shipped_decorations().items():
+        yield f"decoration/{stem}/draw_ribbon", lambda r=ribbon_data: RibbonDrawer.draw_ribbon(r)
+        yield f"decoration/{stem}/load_from_file", lambda p=str(path): RibbonData().load_from_file(p)
+
+
+def measure(func, min_time, max_runs):
+    func()  # Warm-up, so the asset cache and lazy imports are not timed
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_runs and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'runs': len(timings),
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+    }
+
+
+def run(quick=False, min_time=0.2, max_runs=1000, selected=None, out=print):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='ribbons-benchmark-') as scratch:
+        for name, func in cases(scratch, quick):
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            results[name] = measure(func, min_time, max_runs)
+            out(f"{name:<60} {results[name]['median'] * 1000:10.3f}ms  ({results[name]['runs']} runs)")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ.get('QT_QPA_PLATFORM'),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, out=print):
+    # Returns the names of cases more than threshold slower than the baseline
+    regressions = []
+    out(f"{'case':<60} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            out(f"{name:<60} {'-':>10} {result['median'] * 1000:9.3f}ms {'new':>8}")
+            continue
+        change = result['median'] / before['median'] - 1 if before['median'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        out(f"{name:<60} {before['median'] * 1000:9.3f}ms {result['median'] * 1000:9.3f}ms {change:+8.1%}{flag}")
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        out(f"Not run this time: {', '.join(missing)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ribbon rendering and file I/O.")
+    parser.add_argument('-o', '--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare against a results file written by --output")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown that counts as a regression, as a fraction (default: 0.25)")
+    parser.add_argument('--quick', action='store_true', help="Only the smaller synthetic sizes")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds to spend timing each case")
+    parser.add_argument('--max-runs', type=int, default=1000, help="Upper bound on timed runs per case")
+    parser.add_argument('-k', '--select', action='append', help="Only run cases whose name contains this text")
+    args = parser.parse_args(argv)
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    current = run(args.quick, args.min_time, args.max_runs, args.select)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=2)
+        print(f"Wrote {len(current['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("No regressions")
+    del app
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
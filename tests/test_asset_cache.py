@@ -0,0 +1,40 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtGui = pytest.importorskip('PyQt6.QtGui')
+
+from ribbons_of_democracy.components.asset_cache import AssetCache
+
+DEVICE = Path(__file__).parent.parent / 'ribbons_of_democracy' / 'standard_devices' / 'Bronze-6-Point-Star.png'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def test_invalidate_covers_relative_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'devices').mkdir()
+    shutil.copyfile(DEVICE, tmp_path / 'devices' / 'star.png')
+    cache = AssetCache(revalidate_interval=3600)
+    relative = os.path.join('devices', '..', 'devices', 'star.png')
+    original = cache.image(relative).copy()
+    scaled = cache.scaled(relative, 57, 65).copy()
+
+    # Edited in place; the mtime is not checked again within the interval
+    edited = QtGui.QImage(str(DEVICE))
+    edited.invertPixels()
+    assert edited.save(str(tmp_path / 'devices' / 'star.png'))
+    assert cache.image(relative) == original
+
+    # As the watcher reports it, with the absolute path
+    cache.invalidate(str(tmp_path / 'devices' / 'star.png'))
+    assert cache.image(relative) != original
+    assert cache.scaled(relative, 57, 65) != scaled
+    assert cache.image(str(tmp_path / 'devices' / 'star.png')) == cache.image(relative)
+    assert cache.stats()['images'] == 2  # The stale entry and the edited one, shared by both spellings
@@ -0,0 +1,45 @@
+import struct
+from pathlib import Path
+
+from ribbons_of_democracy.components.asset_catalog import PNG_SIGNATURE, AssetCatalog, png_size
+
+DEVICE = Path(__file__).parent.parent / 'ribbons_of_democracy' / 'standard_devices' / 'Bronze-6-Point-Star.png'
+
+
+def png_header(width, height):
+    return PNG_SIGNATURE + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + bytes(5)
+
+
+def test_png_size_reads_ihdr(tmp_path):
+    assert png_size(DEVICE) == (114, 131)
+    path = tmp_path / 'header_only.png'
+    path.write_bytes(png_header(3000, 20))
+    assert png_size(path) == (3000, 20)
+
+
+def test_png_size_rejects_truncated_and_other_files(tmp_path):
+    truncated = tmp_path / 'truncated.png'
+    truncated.write_bytes(DEVICE.read_bytes()[:20])
+    jpeg = tmp_path / 'photo.png'
+    jpeg.write_bytes(b'\xff\xd8\xff\xe0' + bytes(40))
+    empty = tmp_path / 'empty.png'
+    empty.write_bytes(b'')
+
+    assert png_size(truncated) is None
+    assert png_size(jpeg) is None
+    assert png_size(empty) is None
+    assert png_size(tmp_path / 'missing.png') is None
+
+
+def test_catalog_skips_invalid_pngs(tmp_path, capsys):
+    devices = tmp_path / 'standard_devices'
+    devices.mkdir()
+    (devices / 'Good.png').write_bytes(DEVICE.read_bytes())
+    (devices / 'Truncated.png').write_bytes(DEVICE.read_bytes()[:20])
+    (devices / 'Empty.png').write_bytes(png_header(0, 131))
+
+    catalog = AssetCatalog([tmp_path])
+    assert [asset.name for asset in catalog.devices()] == ['Good']
+    assert catalog.get('devices', 'Good').aspect_ratio == 114 / 131
+    assert capsys.readouterr().out.count('not a valid PNG') == 2
+    assert catalog.info(devices / 'Truncated.png') is None
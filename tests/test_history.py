@@ -0,0 +1,86 @@
+import pytest
+
+from ribbons_of_democracy.components.history import History, ListReplace, Operation
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+
+
+def slider_ribbon():
+    ribbon_data = RibbonData()
+    ribbon_data.add_stripe(100, 50, '#ff0000')
+    return ribbon_data
+
+
+def test_operation_is_abstract():
+    with pytest.raises(TypeError):
+        Operation()
+
+
+def test_slider_drag_merges_until_sealed():
+    ribbon_data = slider_ribbon()
+    for x in range(101, 111):
+        ribbon_data.edit_stripe(0, x, 50, '#ff0000', False, merge=True)
+    ribbon_data.history.seal()
+    ribbon_data.edit_stripe(0, 200, 50, '#ff0000', False, merge=True)
+
+    assert ribbon_data.undo()
+    assert ribbon_data.ribbon.stripes[0].x == 110
+    assert ribbon_data.undo()
+    assert ribbon_data.ribbon.stripes[0].x == 100
+    assert ribbon_data.undo()
+    assert ribbon_data.ribbon.stripes == []
+    assert not ribbon_data.undo()
+
+
+def test_merge_window_splits_slow_edits():
+    ribbon_data = slider_ribbon()
+    ribbon_data.history.merge_window = -1.0
+    ribbon_data.edit_stripe(0, 101, 50, '#ff0000', False, merge=True)
+    ribbon_data.edit_stripe(0, 102, 50, '#ff0000', False, merge=True)
+
+    ribbon_data.undo()
+    assert ribbon_data.ribbon.stripes[0].x == 101
+
+
+def test_budget_evicts_oldest_steps():
+    ribbon_data = RibbonData(history_budget=2000)
+    for x in range(50):
+        ribbon_data.add_stripe(x * 10, 5, '#00ff00')
+
+    history = ribbon_data.history
+    assert history.memory_used <= history.budget
+    undone = 0
+    while ribbon_data.undo():
+        undone += 1
+    assert 0 < undone < 50
+    assert len(ribbon_data.ribbon.stripes) == 50 - undone
+    assert [stripe.x for stripe in ribbon_data.ribbon.stripes] == [x * 10 for x in range(50 - undone)]
+
+
+def test_budget_keeps_the_latest_step():
+    history = History(budget=1)
+    ribbon_data = slider_ribbon()
+    history.record(ListReplace('stripes', 0, ribbon_data.ribbon.stripes[0], ribbon_data.ribbon.stripes[0]))
+    assert history.can_undo()
+
+
+def test_new_edit_invalidates_redo():
+    ribbon_data = slider_ribbon()
+    ribbon_data.set_background('#123456')
+    ribbon_data.undo()
+    assert ribbon_data.history.can_redo()
+
+    ribbon_data.add_stripe(300, 20, '#0000ff')
+    assert not ribbon_data.history.can_redo()
+    assert not ribbon_data.redo()
+    assert ribbon_data.ribbon.background == '#000000'
+    # The dropped redo step no longer counts against the budget
+    assert ribbon_data.history.memory_used == sum(operation.size for operation in ribbon_data.history._undo)
+
+
+def test_undo_then_redo_restores_state():
+    ribbon_data = slider_ribbon()
+    ribbon_data.remove_stripe(0)
+    ribbon_data.undo()
+    assert len(ribbon_data.ribbon.stripes) == 1
+    ribbon_data.redo()
+    assert ribbon_data.ribbon.stripes == []
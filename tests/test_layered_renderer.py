@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtGui = pytest.importorskip('PyQt6.QtGui')
+
+from ribbons_of_democracy.components.layered_renderer import LayeredRenderer
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+
+PACKAGE_DIR = Path(__file__).parent.parent / 'ribbons_of_democracy'
+DEVICES_DIR = PACKAGE_DIR / 'standard_devices'
+LOGO = PACKAGE_DIR / 'logo' / 'Super Earth Brand 03 White.png'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def assert_matches_fresh_render(renderer, ribbon_data):
+    image = renderer.render(ribbon_data).copy()
+    fresh = LayeredRenderer().render(ribbon_data)
+    assert image == fresh
+
+
+def base_ribbon():
+    ribbon_data = RibbonData()
+    ribbon_data.set_background('#202060')
+    ribbon_data.add_stripe(300, 80, '#c0c0c0', mirrored=True)
+    ribbon_data.add_device('Bronze', str(DEVICES_DIR / 'Bronze-6-Point-Star.png'), 0, 0, 114, 131)
+    ribbon_data.add_device('Bronze', str(DEVICES_DIR / 'Bronze-6-Point-Star.png'), 0, 0, 114, 131)
+    return ribbon_data
+
+
+def test_same_size_device_swap_is_redrawn():
+    ribbon_data = base_ribbon()
+    renderer = LayeredRenderer()
+    renderer.render(ribbon_data)
+
+    ribbon_data.edit_device(1, 'Silver', str(DEVICES_DIR / 'Silver-6-Point-Star.png'), 0, 0, 114, 131)
+    assert_matches_fresh_render(renderer, ribbon_data)
+    assert renderer.last_rebuilt == ('devices',)
+
+
+def test_same_size_logo_swap_is_redrawn(tmp_path):
+    # Another logo with the same dimensions but different pixels
+    image = QtGui.QImage(str(LOGO))
+    image.invertPixels()
+    other = tmp_path / 'inverted.png'
+    assert image.save(str(other))
+
+    ribbon_data = base_ribbon()
+    ribbon_data.set_logo(str(LOGO))
+    renderer = LayeredRenderer()
+    renderer.render(ribbon_data)
+
+    ribbon_data.set_logo(str(other))
+    assert_matches_fresh_render(renderer, ribbon_data)
+    assert renderer.last_rebuilt == ('logo',)
+
+
+def test_incremental_edits_match_fresh_render():
+    ribbon_data = base_ribbon()
+    renderer = LayeredRenderer()
+    renderer.render(ribbon_data)
+
+    ribbon_data.edit_stripe(0, 320, 60, '#ff8000', True)
+    assert_matches_fresh_render(renderer, ribbon_data)
+    ribbon_data.move_device(0, -40, 10)
+    assert_matches_fresh_render(renderer, ribbon_data)
+    ribbon_data.remove_device(1)
+    assert_matches_fresh_render(renderer, ribbon_data)
+    ribbon_data.undo()
+    assert_matches_fresh_render(renderer, ribbon_data)
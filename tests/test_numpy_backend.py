@@ -0,0 +1,58 @@
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+np = pytest.importorskip('numpy')
+QtGui = pytest.importorskip('PyQt6.QtGui')
+
+from ribbons_of_democracy.components import numpy_backend
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+from ribbons_of_democracy.components.ribbon_drawer import RibbonDrawer
+
+PACKAGE_DIR = Path(__file__).parent.parent / 'ribbons_of_democracy'
+DECORATIONS_DIR = Path(__file__).parent.parent / 'decorations'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def pixels(image):
+    image = image.convertToFormat(numpy_backend.IMAGE_FORMAT)
+    return numpy_backend.image_array(image).copy()
+
+
+def translucent_ribbon():
+    ribbon_data = RibbonData()
+    ribbon_data.set_background('#80ff0000')
+    ribbon_data.add_stripe(-20, 100, '#4000ff00', mirrored=True)
+    ribbon_data.add_stripe(1000, 100, '#123456', mirrored=True)
+    ribbon_data.set_texture_enabled(True)
+    return ribbon_data
+
+
+def device_ribbon():
+    ribbon_data = RibbonData()
+    device = PACKAGE_DIR / 'standard_devices' / 'Vector---Standard.png'
+    ribbon_data.add_device('Vector', str(device), 0, 0, 100, 84)
+    ribbon_data.add_stripe(300, 40, '#aabbcc', mirrored=True)
+    ribbon_data.set_frame('gold')
+    ribbon_data.set_texture_enabled(True)
+    return ribbon_data
+
+
+def shipped_ribbons():
+    for path in sorted(DECORATIONS_DIR.glob('*.json')):
+        ribbon_data = RibbonData()
+        ribbon_data.load_from_file(str(path))
+        yield ribbon_data
+
+
+@pytest.mark.parametrize('ribbon_data', [*shipped_ribbons(), translucent_ribbon(), device_ribbon()])
+def test_matches_qpainter_pixels(ribbon_data):
+    expected = pixels(RibbonDrawer.draw_ribbon(ribbon_data).toImage())
+    actual = pixels(numpy_backend.render_image(ribbon_data))
+    assert np.array_equal(expected, actual)
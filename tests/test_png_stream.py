@@ -0,0 +1,70 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtGui = pytest.importorskip('PyQt6.QtGui')
+
+from ribbons_of_democracy.components.png_stream import PngWriter
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+from ribbons_of_democracy.components.ribbon_drawer import RibbonDrawer
+
+DEVICE = Path(__file__).parent.parent / 'ribbons_of_democracy' / 'standard_devices' / 'Bronze-6-Point-Star.png'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+@pytest.fixture(scope='module')
+def image():
+    # Semi-transparent edges from the device exercise the unpremultiply
+    ribbon_data = RibbonData()
+    ribbon_data.set_background('#202060')
+    ribbon_data.add_stripe(300, 80, '#c0c0c0', mirrored=True)
+    ribbon_data.add_device('Bronze', str(DEVICE), 0, 0, 114, 131)
+    ribbon_data.set_frame('gold')
+    return RibbonDrawer.render_image(ribbon_data, 512, 141)
+
+
+def rgba(image):
+    return image.convertToFormat(QtGui.QImage.Format.Format_RGBA8888)
+
+
+def test_matches_qimage_save(image, tmp_path):
+    path = tmp_path / 'streamed.png'
+    with PngWriter(path, image.width(), image.height()) as writer:
+        # In strips, as the tiled export writes them
+        writer.write_image(image.copy(0, 0, image.width(), 50))
+        writer.write_image(image.copy(0, 50, image.width(), image.height() - 50))
+    assert image.save(str(tmp_path / 'saved.png'))
+
+    streamed = QtGui.QImage(str(path))
+    assert not streamed.isNull()
+    assert rgba(streamed) == rgba(QtGui.QImage(str(tmp_path / 'saved.png')))
+    assert sorted(os.listdir(tmp_path)) == ['saved.png', 'streamed.png']
+
+
+def test_blank_rows_and_file_objects(image):
+    buffer = io.BytesIO()
+    writer = PngWriter(buffer, image.width(), image.height() + 10)
+    writer.write_blank_rows(10, (255, 0, 0, 255))
+    writer.write_image(image)
+    writer.close()
+
+    decoded = QtGui.QImage.fromData(buffer.getvalue(), 'PNG')
+    assert (decoded.width(), decoded.height()) == (image.width(), image.height() + 10)
+    assert decoded.pixelColor(0, 9) == QtGui.QColor(255, 0, 0)
+    assert rgba(decoded.copy(0, 10, image.width(), image.height())) == rgba(image)
+
+
+def test_incomplete_write_leaves_no_file(image, tmp_path):
+    path = tmp_path / 'short.png'
+    writer = PngWriter(path, image.width(), image.height())
+    writer.write_image(image.copy(0, 0, image.width(), 10))
+    with pytest.raises(ValueError):
+        writer.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,54 @@
+import os
+import shutil
+from pathlib import Path
+
+from ribbons_of_democracy.components import render_cache
+from ribbons_of_democracy.components.render_cache import RenderCache
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+
+DEVICE = Path(__file__).parent.parent / 'ribbons_of_democracy' / 'standard_devices' / 'Bronze-6-Point-Star.png'
+SIZE = (1024, 282)
+
+
+def ribbon_with_device(path):
+    ribbon_data = RibbonData()
+    ribbon_data.add_stripe(300, 80, '#c0c0c0', mirrored=True)
+    ribbon_data.add_device('Bronze', str(path), 0, 0, 114, 131)
+    return ribbon_data
+
+
+def test_key_changes_with_asset_bytes(tmp_path):
+    device = tmp_path / 'device.png'
+    shutil.copyfile(DEVICE, device)
+    cache = RenderCache(tmp_path / 'cache')
+    ribbon_data = ribbon_with_device(device)
+    key = cache.key_for(ribbon_data, SIZE)
+    assert cache.key_for(ribbon_data, SIZE) == key
+
+    # Same size, different bytes, and a new mtime as any editor would leave
+    data = bytearray(device.read_bytes())
+    data[len(data) // 2] ^= 0xff
+    device.write_bytes(data)
+    stat = device.stat()
+    os.utime(device, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.key_for(ribbon_data, SIZE) != key
+
+
+def test_key_ignores_info_but_not_size(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    ribbon_data = ribbon_with_device(DEVICE)
+    key = cache.key_for(ribbon_data, SIZE)
+
+    ribbon_data.set_ribbon_info('Renamed', 'Details', '')
+    assert cache.key_for(ribbon_data, SIZE) == key
+    assert cache.key_for(ribbon_data, (2048, 564)) != key
+    assert cache.key_for(ribbon_data, SIZE, 'numpy') != key
+
+
+def test_key_changes_with_renderer_version(tmp_path, monkeypatch):
+    cache = RenderCache(tmp_path / 'cache')
+    ribbon_data = ribbon_with_device(DEVICE)
+    key = cache.key_for(ribbon_data, SIZE)
+
+    monkeypatch.setattr(render_cache, 'RENDERER_VERSION', render_cache.RENDERER_VERSION + 1)
+    assert cache.key_for(ribbon_data, SIZE) != key
@@ -0,0 +1,68 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtGui = pytest.importorskip('PyQt6.QtGui')
+
+from ribbons_of_democracy.components.render_server import RenderService, RequestError
+
+ROOT = Path(__file__).parent.parent
+DEVICE = ROOT / 'ribbons_of_democracy' / 'standard_devices' / 'Bronze-6-Point-Star.png'
+LOGO = ROOT / 'ribbons_of_democracy' / 'logo' / 'Super Earth Brand 03 White.png'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+@pytest.fixture
+def service():
+    service = RenderService([ROOT / 'decorations'], jobs=2)
+    yield service
+    service.close()
+
+
+def post(service, devices=(), logo=None):
+    data = {'background': '#202060', 'devices': [
+        {'name': name, 'path': str(path), 'x': 0, 'y': 0, 'width': 114, 'height': 131} for name, path in devices]}
+    if logo:
+        data['logo'] = str(logo)
+    return service.parse(json.dumps(data).encode('utf-8'))
+
+
+def test_assets_in_asset_folders_are_used(service):
+    ribbon = post(service, [('Bronze', DEVICE)], logo=os.path.relpath(LOGO, ROOT / 'decorations')).ribbon
+    assert ribbon.devices[0].path == str(DEVICE)
+    assert os.path.samefile(ribbon.logo, LOGO)
+
+
+def test_assets_from_elsewhere_are_found_by_name(service):
+    ribbon = post(service, [('Bronze', 'C:\\Users\\someone\\Bronze-6-Point-Star.png')]).ribbon
+    assert ribbon.devices[0].path == str(DEVICE)
+
+
+def test_files_outside_asset_folders_are_rejected(service, tmp_path):
+    secret = tmp_path / 'secret.png'
+    secret.write_bytes(DEVICE.read_bytes())
+    for devices, logo in (([('Secret', secret)], None), ([], secret), ([('Up', DEVICE.parent / '..' / '..' / 'README.md')], None)):
+        with pytest.raises(RequestError) as error:
+            post(service, devices, logo)
+        assert error.value.status == 400
+
+
+def test_finished_render_is_cached_before_leaving_flight(service):
+    service._pool = ThreadPoolExecutor(max_workers=2)
+    ribbon_data = post(service, [('Bronze', DEVICE)])
+    etag = service.etag(ribbon_data, (256, 70))
+    body = service.render(ribbon_data, (256, 70), etag)
+
+    service._pool.shutdown(wait=True)
+    assert service.cache.get(etag) == body
+    assert service._in_flight == {}
+    assert service.render(ribbon_data, (256, 70), etag) == body
+    assert service.metrics.get('render')['count'] == 1
@@ -0,0 +1,63 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from ribbons_of_democracy import cli
+from ribbons_of_democracy.components.ribbon_data import RibbonData
+from ribbons_of_democracy.components.ribbon_library import LibraryError, RibbonLibrary, pack_folder, unpack_library
+
+DECORATIONS_DIR = Path(__file__).parent.parent / 'decorations'
+
+
+@pytest.fixture
+def decorations(tmp_path):
+    folder = tmp_path / 'decorations'
+    shutil.copytree(DECORATIONS_DIR, folder)
+    return folder
+
+
+def loaded(path):
+    ribbon_data = RibbonData()
+    ribbon_data.load_from_file(str(path))
+    return ribbon_data.to_dict()
+
+
+def test_pack_list_unpack_round_trip(decorations, tmp_path):
+    library_path = tmp_path / 'all.rodlib'
+    originals = {path.stem: loaded(path) for path in decorations.glob('*.json')}
+
+    assert pack_folder(decorations, library_path) == len(originals)
+    with RibbonLibrary(library_path) as library:
+        assert sorted(library.names()) == sorted(originals)
+        for name, data in originals.items():
+            assert library.info(name) == data['info']
+
+    assert unpack_library(library_path, tmp_path / 'unpacked') == len(originals)
+    unpacked = {path.stem: loaded(path) for path in (tmp_path / 'unpacked').glob('*.json')}
+    assert unpacked == originals
+
+
+def test_failed_pack_leaves_no_files(decorations, tmp_path, capsys):
+    (decorations / 'broken.json').write_text('{"stripes": [')
+    library_path = tmp_path / 'all.rodlib'
+
+    with pytest.raises(LibraryError, match='broken.json'):
+        pack_folder(decorations, library_path)
+    assert os.listdir(tmp_path) == ['decorations']
+
+    assert cli.main(['library', 'pack', str(decorations), str(library_path)]) == 1
+    output = capsys.readouterr().out
+    assert output.startswith('Could not pack') and output.count('\n') == 1
+    assert os.listdir(tmp_path) == ['decorations']
+
+
+def test_damaged_library_is_reported(tmp_path, capsys):
+    library_path = tmp_path / 'damaged.rodlib'
+    library_path.write_bytes(b'RODLIB01' + bytes(16) + b'not json')
+
+    with pytest.raises(LibraryError):
+        RibbonLibrary(library_path)
+    assert cli.main(['library', 'list', str(library_path)]) == 1
+    assert capsys.readouterr().out.startswith('Could not list')
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from ribbons_of_democracy.components.ribbon_model import Stripe
+from ribbons_of_democracy.components.stripe_runs import StripeRuns
+
+WIDTH = 64
+COLORS = ('#ff0000', '#00ff00', '#0000ff', '#80ffffff', '#00000000', '#c0102030')
+
+
+def random_stripe(rng):
+    x = rng.randrange(-8, WIDTH)
+    return Stripe(x, rng.randrange(0, 24), rng.choice(COLORS), rng.random() < 0.4)
+
+
+def expected_layers(stripes, x):
+    # Brute force: every copy covering x in paint order, a stripe then its
+    # mirror, cut at the topmost opaque one
+    layers = []
+    for stripe in stripes:
+        spans = [(stripe.x, stripe.x + stripe.width)]
+        if stripe.mirrored:
+            spans.append((WIDTH - stripe.x - stripe.width, WIDTH - stripe.x))
+        layers.extend(stripe for start, end in spans if start <= x < end)
+    opaque = [i for i, stripe in enumerate(layers) if stripe.argb >> 24 == 0xFF]
+    return layers[opaque[-1]:] if opaque else layers
+
+
+def expected_top(stripes, x):
+    covering = [i for i, stripe in enumerate(stripes)
+                if stripe.x <= x < stripe.x + stripe.width
+                or stripe.mirrored and WIDTH - stripe.x - stripe.width <= x < WIDTH - stripe.x]
+    return covering[-1] if covering else None
+
+
+def check(runs, stripes, rng):
+    assert runs.runs[0][0] == 0 and runs.runs[-1][1] == WIDTH
+    assert runs.starts == [run[0] for run in runs.runs]
+    for run, following in zip(runs.runs, runs.runs[1:]):
+        assert run[0] < run[1] == following[0]
+    for x in range(WIDTH):
+        run = runs.run_at(x)
+        assert run[0] <= x < run[1]
+        assert [id(stripe) for stripe in run[2]] == [id(stripe) for stripe in expected_layers(stripes, x)]
+        assert runs.stripe_at(x) == expected_top(stripes, x)
+    assert runs.run_at(-1) is None and runs.run_at(WIDTH) is None
+
+    start = rng.randrange(0, WIDTH)
+    end = rng.randrange(start + 1, WIDTH + 1)
+    assert runs.runs_between(start, end) == [run for run in runs.runs if run[0] < end and run[1] > start]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_updates_match_brute_force(seed):
+    rng = random.Random(seed)
+    runs = StripeRuns(WIDTH)
+    stripes = []
+    for _ in range(100):
+        action = rng.random()
+        if action < 0.4 or not stripes:
+            stripes.insert(rng.randrange(len(stripes) + 1), random_stripe(rng))
+        elif action < 0.6:
+            del stripes[rng.randrange(len(stripes))]
+        elif action < 0.9:
+            index = rng.randrange(len(stripes))
+            old = stripes[index]
+            stripes[index] = Stripe(old.x + rng.randrange(-4, 5), max(0, old.width + rng.randrange(-4, 5)),
+                                    old.color, old.mirrored)
+        else:
+            # An equal but separate stripe, as a duplicated stripe would be
+            stripes.insert(rng.randrange(len(stripes) + 1), Stripe(**rng.choice(stripes).to_dict()))
+        runs.update(list(stripes))
+        check(runs, stripes, rng)
+    assert runs.update(list(stripes)) == []
+
+
+def test_copy_is_independent():
+    rng = random.Random(0)
+    stripes = [random_stripe(rng) for _ in range(10)]
+    runs = StripeRuns(WIDTH)
+    runs.update(stripes)
+    snapshot = runs.copy()
+
+    changed = stripes[:5] + stripes[6:]
+    runs.update(changed)
+    check(runs, changed, rng)
+    check(snapshot, stripes, rng)